@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """
+    같은 키에 대한 동시 요청을 하나로 합치는 클래스
+
+    키에 해당하는 요청이 진행 중이면 새로 실행하지 않고 그 결과를 함께 기다립니다.
+    요청이 끝나면 키를 지우므로 결과를 캐시하지는 않습니다. (진행 중인 동안만 공유)
+    """
+
+    def __init__(self, cancelled_result: Any = None):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # 요청을 시작한 쪽이 취소되었을 때 기다리던 쪽에 돌려줄 값
+        self._cancelled_result = cancelled_result
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def fetch(self, key: Hashable, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """key에 대한 요청을 실행하거나, 진행 중인 같은 요청의 결과를 반환"""
+        future = self._inflight.get(key)
+        if future is not None:
+            # 기다리던 쪽이 취소되어도 원래 요청은 계속되도록 shield
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await coro_factory()
+        except asyncio.CancelledError:
+            future.set_result(self._cancelled_result)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 기다리는 쪽이 없을 때 "exception was never retrieved" 경고 방지
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(result)
+        return result
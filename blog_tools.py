@@ -1,5 +1,5 @@
 from typing import Dict, Any
-from utils import make_api_request, upload_image
+from utils import make_api_request, upload_image, cached_api_get, clear_response_cache, BLOG_URL
 
 def register_blog_tools(mcp_server):
     """블로그 관련 도구들을 MCP 서버에 등록"""
@@ -10,7 +10,7 @@ def register_blog_tools(mcp_server):
     )
     async def get_blog_profile() -> Dict[str, Any]:
         """블로그 프로필 정보를 반환"""
-        return await make_api_request("GET", "/blog/profile/")
+        return await cached_api_get("/blog/profile/")
 
     @mcp_server.tool(
         name="get_blog_list",
@@ -18,7 +18,7 @@ def register_blog_tools(mcp_server):
     )
     async def get_blog_list(page: int = 1) -> Dict[str, Any]:
         """블로그 포스트 목록을 반환"""
-        return await make_api_request("GET", f"/blog/list/{page}")
+        return await cached_api_get(f"/blog/list/{page}")
 
     @mcp_server.tool(
         name="get_blog_post",
@@ -26,7 +26,7 @@ def register_blog_tools(mcp_server):
     )
     async def get_blog_post(blog_id: int) -> Dict[str, Any]:
         """특정 블로그 포스트 내용을 반환"""
-        return await make_api_request("GET", f"/blog/{blog_id}")
+        return await make_api_request("GET", BLOG_URL(blog_id))
 
     @mcp_server.tool(
         name="create_blog_post",
@@ -45,7 +45,10 @@ def register_blog_tools(mcp_server):
             "is_public": is_public,
             "tags": tags
         }
-        return await make_api_request("POST", "/blog/create/", blog_data)
+        result = await make_api_request("POST", "/blog/create/", blog_data)
+        if "error" not in result:
+            clear_response_cache()
+        return result
 
     @mcp_server.tool(
         name="update_blog_post",
@@ -65,7 +68,10 @@ def register_blog_tools(mcp_server):
             "is_public": is_public,
             "tags": tags
         }
-        return await make_api_request("PUT", f"/blog/{blog_id}/", blog_data)
+        result = await make_api_request("PUT", f"/blog/{blog_id}/", blog_data)
+        if "error" not in result:
+            clear_response_cache()
+        return result
 
     @mcp_server.tool(
         name="upload_blog_image",
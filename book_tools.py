@@ -1,8 +1,327 @@
-from typing import Dict, Any, List
-from utils import make_api_request, put_page, upload_image, flatten_pages
+import sys
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+from utils import (
+    make_api_request, put_page, upload_image, count_pages, gather_with_limit,
+    cached_api_get, cached_api_get_entry, clear_response_cache, PAGE_URL, BOOK_URL
+)
+from http_client import MAX_CONCURRENT_REQUESTS
 from search_utils import get_book_cache, get_page_searcher
 import renumber_utils
 
+# batch_get_pages에서 동시에 보낼 최대 페이지 조회 요청 수 (공유 클라이언트의 연결 풀 크기에 맞춤)
+PAGE_FETCH_CONCURRENCY = MAX_CONCURRENT_REQUESTS
+# batch_update_pages에서 동시에 보낼 최대 페이지 수정 요청 수
+PAGE_UPDATE_CONCURRENCY = MAX_CONCURRENT_REQUESTS // 2
+
+# 최근에 조회하거나 수정한 페이지를 잠시 보관 (update_page가 곧바로 이어질 때 GET 생략)
+RECENT_PAGE_TTL = 10.0   # 초
+RECENT_PAGE_SIZE = 256
+
+# 실행 중인 백그라운드 작업 (완료 전에 가비지 컬렉션되지 않도록 참조 유지)
+_background_tasks: set = set()
+
+def run_in_background(coro) -> asyncio.Task:
+    """응답을 기다리게 할 필요가 없는 작업(캐시 저장 등)을 백그라운드로 실행"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+_recent_pages: "OrderedDict[int, tuple]" = OrderedDict()
+
+def _remember_page(page_id: int, page: Dict[str, Any], fetched_at: Optional[float] = None) -> None:
+    """
+    조회·수정한 페이지를 최근 페이지 캐시에 보관 (반환값은 공유되므로 수정 금지)
+    
+    fetched_at은 페이지를 가져온 time.monotonic() 시각입니다. (생략하면 현재 시각)
+    응답 캐시에서 받은 페이지는 원래 요청 시각을 넘겨야 TTL이 실제 나이로 계산됩니다.
+    """
+    if fetched_at is None:
+        fetched_at = time.monotonic()
+    entry = _recent_pages.get(page_id)
+    if entry is not None and entry[0] > fetched_at:
+        return    # 이미 더 최근 값이 있음
+    _recent_pages[page_id] = (fetched_at, page)
+    _recent_pages.move_to_end(page_id)
+    while len(_recent_pages) > RECENT_PAGE_SIZE:
+        _recent_pages.popitem(last=False)
+
+def _recent_page(page_id: int) -> Optional[Dict[str, Any]]:
+    """RECENT_PAGE_TTL 안에 조회·수정한 페이지 반환 (없거나 만료되면 None)"""
+    entry = _recent_pages.get(page_id)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[0] >= RECENT_PAGE_TTL:
+        del _recent_pages[page_id]
+        return None
+    return entry[1]
+
+def _report_failure(task: asyncio.Task) -> None:
+    """백그라운드 작업이 실패했으면 stderr에 기록"""
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Warning: Background task failed: {task.exception()}", file=sys.stderr)
+
+def invalidate_book_cache(book_id: int) -> None:
+    """
+    책 캐시를 즉시 무효 처리하고, 파일 삭제는 백그라운드 스레드에서 진행
+    
+    수정 도구의 응답이 디스크 작업을 기다리지 않도록 합니다.
+    """
+    cache = get_book_cache()
+    cache.mark_stale(book_id)
+    task = run_in_background(asyncio.to_thread(cache.invalidate_book, book_id))
+    task.add_done_callback(_report_failure)
+
+async def gather_by_page(
+    items: List[Dict[str, Any]],
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+) -> List[Any]:
+    """
+    항목을 page_id별로 묶어 묶음 안에서는 차례로, 묶음끼리는 동시에 실행 (결과는 입력 순서 유지)
+    
+    같은 페이지 항목끼리 동시에 보내면 같은 원본으로 만든 나중 PUT이
+    앞의 수정을 덮어쓰므로, 같은 페이지는 앞 항목이 끝난 뒤에 처리합니다.
+    """
+    groups: Dict[Any, List[int]] = {}
+    for position, item in enumerate(items):
+        groups.setdefault(item.get("page_id"), []).append(position)
+
+    # 모든 묶음이 끝나면 빈 자리(None)가 남지 않음
+    results: List[Any] = [None] * len(items)
+
+    async def run_group(positions: List[int]) -> None:
+        for position in positions:
+            results[position] = await run(items[position])
+
+    await gather_with_limit(PAGE_UPDATE_CONCURRENCY, *(run_group(positions) for positions in groups.values()))
+    return results
+
+async def invalidate_page_books(page_id: int) -> None:
+    """
+    페이지가 속한 책을 모를 때 그 페이지가 들어 있는 모든 책 캐시를 무효화
+    
+    디스크의 캐시 파일까지 훑으므로 작업 스레드에서 찾습니다.
+    """
+    cache = get_book_cache()
+    for book_id in await asyncio.to_thread(cache.books_with_page, page_id):
+        invalidate_book_cache(book_id)
+
+async def _update_page(
+    page_id:   int,
+    subject:   str | None = None,
+    content:   str | None = None,
+    parent_id: int | None = None,
+    open_yn:   str | None = None,
+    check_changes: bool = False,
+) -> Tuple[Dict[str, Any], Optional[int]]:
+    """
+    update_page의 1~3단계 (캐시 무효화 제외)
+
+    Returns:
+        (PUT 응답 또는 오류, 수정된 페이지의 book_id)
+    """
+    fields = ("subject", "content", "parent_id", "open_yn")
+    all_supplied = None not in (subject, content, parent_id, open_yn)
+
+    # 1) 현재 상태 확보 (RECENT_PAGE_TTL 안에 이 프로세스가 조회·수정한 페이지 → GET 순)
+    # 책 캐시는 최대 하루 지난 데이터일 수 있으므로 병합 기준으로 쓰지 않음
+    current = _recent_page(page_id)
+
+    # 모든 필드가 전달되면 GET 생략 (check_changes=True면 GET으로 변경 여부 확인)
+    if current is None and (not all_supplied or check_changes):
+        current = await make_api_request("GET", PAGE_URL(page_id))
+        if "error" in current:
+            return current, None    # 404·권한 오류 등 그대로 반환
+        _remember_page(page_id, current)
+
+    if current is None:
+        # 모든 필드가 전달되어 병합할 값이 없음 → 바로 PUT
+        # 책 캐시는 무효화할 book_id를 알아내는 데만 사용 (모르면 명세상 허용되는 0)
+        cached = get_book_cache().find_page(page_id)
+        payload = {
+            "id":        page_id,
+            "subject":   subject,
+            "content":   content,
+            "parent_id": parent_id,
+            "open_yn":   open_yn,
+            "book_id":   cached[0] if cached else 0,
+        }
+        delta_fields = list(fields)
+    else:
+        # 2) diff → payload 만들기
+        payload = {
+            "id":        page_id,                 # 필수
+            "subject":   subject   if subject   is not None else current["subject"],
+            "content":   content   if content   is not None else current["content"],
+            "parent_id": parent_id if parent_id is not None else current["parent_id"],
+            "open_yn":   open_yn   if open_yn   is not None else current["open_yn"],
+            "book_id":   current["book_id"],      # 명세상 필요 (0 으로 줘도 되지만 안전하게)
+        }
+
+        delta_fields = [k for k in fields if payload[k] != current[k]]
+
+        if not delta_fields:
+            return {
+                "error": "NO_CHANGES",
+                "message": "변경된 값이 없습니다. 수정할 항목을 하나 이상 넣어 주세요."
+            }, None
+
+    # 3) PUT
+    result = await put_page(page_id, payload)
+
+    # 바뀐 필드 정보 반환 (UX 용), book_id를 모르면 응답에 담긴 값 사용
+    result["updated_fields"] = delta_fields
+    book_id = payload["book_id"] or result.get("book_id")
+
+    # 저장한 값을 최근 페이지로 보관해 이어지는 수정에서 GET 생략
+    if "error" in result:
+        _recent_pages.pop(page_id, None)
+    else:
+        _remember_page(page_id, {**payload, "book_id": book_id or 0})
+    return result, book_id
+
+# get_wikidocs_formatting_guide가 반환하는 고정 가이드 (호출마다 만들지 않도록 모듈 상수로 보관)
+_FORMATTING_GUIDE = """# 위키독스 책 페이지 포매팅 가이드
+
+## 🚨 핵심 주의사항
+
+### 1. 헤딩 규칙 (매우 중요!)
+- 내용 작성 시 **H1 태그 사용 금지!** → H2(##) 또는 H3(###)부터 시작
+- 이유: H1은 전자책 변환 시 자동으로 챕터로 인식됨
+- H2에는 자동으로 밑줄이 적용됨
+- 계층 구조: `## → ### → ####` 순서로 사용
+- 페이지 제목을 첫 번째 줄에 작성할 경우 제목이 중복으로 표시되므로, 페이지 제목 없이 페이지 도입부 또는 섹션 제목으로 내용을 시작하는 것이 좋습니다.
+
+### 2. 리스트 작성 규칙
+- **본문 뒤 리스트 작성 시 반드시 공백 한 줄 삽입**
+```
+본문 내용입니다.
+
+- 리스트 항목 1
+- 리스트 항목 2
+```
+
+- **중첩 리스트**: 하위 항목은 4칸 들여쓰기
+```
+- 상위 항목
+    - 하위 항목 (4칸 들여쓰기)
+    - 하위 항목 2
+```
+
+### 3. 코드 블록 규칙
+**본문 뒤 코드 블록 작성 시 반드시 공백 한 줄 삽입**
+
+**일반 코드**: 백쿼트 3개 또는 4칸 들여쓰기
+
+```python
+# 일반 코드 블록
+def example():
+    return "hello"
+```
+
+**⚠️ 리스트 내 코드**: 백쿼트 불가! 반드시 8칸 들여쓰기
+
+```
+- 설명
+        # 리스트 내 코드는 8칸 들여쓰기만 가능
+        def list_code():
+            return "example"
+```
+
+### 4. 그 밖의 특이 사항
+- 물결표(tilde)가 일반 문자열로 인식되므로 앞에 백슬래시를 넣지 마세요.
+- 특수 기호(볼드체를 위한 asterisk, 이스케이프를 뜻하는 백슬래시 등)를 실수로 이스케이프하여 렌더링 결과에 그대로 노출하지 않게 유의하세요.
+
+
+## 🎨 위키독스 전용 특수 기능
+
+**팁 블록**
+
+[[TIP]]
+**팁 블록에 대하여**
+
+도움말이나 팁을 설명하는 블록을 작성할 수 있습니다.  
+팁 블록 위의 섹션 제목과 팁 블록 사이에 적절한 맥락을 제공해야 구조적으로 어색하지 않습니다.
+팁 블록 내에서는 일부 마크다운 렌더링이 작동하지 않습니다. 예를 들어, 팁 블록 제목은 **굵은 글씨**로 표시하세요.
+[[/TIP]]
+
+**사용자 정의 팁 블록**
+
+[[TIP("알아두기")]]
+**팁 블록에 대하여**
+
+도움말이나 팁을 설명하는 블록을 작성할 수 있습니다.
+[[/TIP]]
+
+**목차 자동생성 (해당 위치에 목차가 생성됨. 가급적 처음 제목이 나오기 전에 넣는 것이 구조상 논리적임)**
+
+[TOC]
+
+**코드 블록 내 강조**
+
+```python
+def sum(a, b):
+    [[MARK]]return a+b[[/MARK]]
+```
+
+**코드 블록 내 삭제 표시**
+
+```python
+def sum(a, b):
+    [[SMARK]]return a+b[[/SMARK]]
+```
+
+**용어 링크**
+
+[["용어명"]]
+
+
+## 🖼️ 이미지 처리
+- **기본**: `![alt텍스트](이미지URL)`
+- **가운데 정렬**:
+```html
+<p align="center">
+<img src="이미지URL" alt="설명">
+</p>
+```
+- **⚠️ 전자책 판매용**: img 태그 사용 금지 (PDF 호환성 문제)
+
+## 🧮 수식 표현 (MathJax)
+- **블록 수식**: `$$수식$$`
+- **인라인 수식**: `$수식$` (⚠️ 공백 없이! 매우 중요)
+- **줄바꿈**: `\\\\` 사용
+- **정렬**: `\\begin{aligned}` 환경 활용
+
+### 수식 예시
+```
+$$
+\\begin{aligned}
+f(x) &= ax^2 + bx + c \\\\
+&= a(x + \\frac{b}{2a})^2 + c - \\frac{b^2}{4a}
+\\end{aligned}
+$$
+```
+
+## 📺 미디어 삽입
+### 유튜브 동영상
+```html
+<style>.embed-container { position: relative; padding-bottom: 56.25%; height: 0; overflow: hidden; max-width: 100%; } .embed-container iframe, .embed-container object, .embed-container embed { position: absolute; top: 0; left: 0; width: 100%; height: 100%; }</style><div class='embed-container'><iframe src='https://www.youtube.com/embed/동영상ID' frameborder='0' allowfullscreen></iframe></div>
+```
+
+## ✅ 체크리스트
+
+책 페이지 작성 전 반드시 확인:
+- [ ] H1 태그 사용하지 않았는가?
+- [ ] 본문 뒤 리스트에 공백 한 줄 넣었는가?
+- [ ] 리스트 내 코드를 8칸 들여쓰기로 작성했는가?
+- [ ] 수식에서 $ 기호 앞뒤에 공백을 넣지 않았는가?
+- [ ] 전자책용이면 HTML 태그를 피했는가?
+
+이 가이드를 따라야 위키독스에서 올바르게 렌더링됩니다!"""
+
 def register_book_tools(mcp_server):
     """책 관련 도구들을 MCP 서버에 등록"""
     
@@ -12,7 +331,7 @@ def register_book_tools(mcp_server):
     )
     async def list_my_books() -> Dict[str, Any]:
         """/napi/books : 본인이 작성한 책을 조회합니다."""
-        result = await make_api_request("GET", "/books/")
+        result = await cached_api_get("/books/")
         if "error" in result:
             return result
         return {"books": result, "total_count": len(result)}
@@ -27,18 +346,19 @@ def register_book_tools(mcp_server):
         cache = get_book_cache()
         
         # 먼저 API에서 최신 데이터 가져오기 시도
-        book_data = await make_api_request("GET", f"/books/{book_id}/")
+        # (가져오는 동안 책이 수정되면 이 데이터는 저장하지 않도록 무효화 세대를 먼저 받아 둠)
+        generation = cache.generation(book_id)
+        book_data = await make_api_request("GET", BOOK_URL(book_id))
         
         if "error" not in book_data:
-            # API 요청 성공 시 캐시에 저장
-            cache.save_book_data(book_id, book_data)
-            flat_pages = flatten_pages(book_data.get("pages", []))
+            # API 요청 성공 시 캐시에 저장 (파일 쓰기가 응답을 지연시키지 않도록 백그라운드 스레드에서)
+            run_in_background(asyncio.to_thread(cache.save_book_data, book_id, book_data, generation))
             
             return {
                 "book_id": book_id,
                 "subject": book_data.get("subject", ""),
                 "summary": book_data.get("summary", ""),
-                "total_pages": len(flat_pages),
+                "total_pages": count_pages(book_data.get("pages", [])),
                 "status": "ready",
                 "data_source": "api"
             }
@@ -46,14 +366,13 @@ def register_book_tools(mcp_server):
         # API 요청 실패 시 캐시 사용 시도
         cached_data = cache.load_book_data(book_id)
         if cached_data:
-            flat_pages = flatten_pages(cached_data.get("pages", []))
             cache_info = get_page_searcher().get_cache_info(book_id)
             
             return {
                 "book_id": book_id,
                 "subject": cached_data.get("subject", ""),
                 "summary": cached_data.get("summary", ""),
-                "total_pages": len(flat_pages),
+                "total_pages": count_pages(cached_data.get("pages", [])),
                 "status": "ready",
                 "data_source": "cache",
                 "cached_at": cache_info.get("cached_at"),
@@ -85,26 +404,28 @@ def register_book_tools(mcp_server):
         cache = get_book_cache()
         
         # 캐시 확인, 없으면 API에서 가져오기
+        book_data = None
         cache_info = searcher.get_cache_info(book_id)
         if not cache_info.get("cached"):
-            # API에서 책 데이터 가져오기
-            book_data = await make_api_request("GET", f"/books/{book_id}/")
+            # API에서 책 데이터 가져오기 (가져오는 동안 무효화되면 저장하지 않도록 세대를 먼저 받아 둠)
+            generation = cache.generation(book_id)
+            book_data = await make_api_request("GET", BOOK_URL(book_id))
             if "error" in book_data:
                 return book_data
             
-            # 캐시에 저장
-            cache.save_book_data(book_id, book_data)
+            # 캐시 저장은 백그라운드 스레드에서 진행하고, 검색은 받은 데이터로 바로 실행
+            run_in_background(asyncio.to_thread(cache.save_book_data, book_id, book_data, generation))
+            book_subject = book_data.get("subject", "")
+        else:
+            book_subject = cache_info.get("book_subject", "")
         
         # 검색 실행
-        results = searcher.search_pages(book_id, query, max_results)
-        
-        # 최신 캐시 정보 가져오기
-        cache_info = searcher.get_cache_info(book_id)
+        results = searcher.search_pages(book_id, query, max_results, book_data=book_data)
         
         return {
             "query": query,
             "book_id": book_id,
-            "book_subject": cache_info.get("book_subject", ""),
+            "book_subject": book_subject,
             "total_matches": len(results),
             "results": results
         }
@@ -120,21 +441,24 @@ def register_book_tools(mcp_server):
         cache = get_book_cache()
         
         # 캐시 확인, 없으면 API에서 가져오기
+        book_data = None
         cache_info = searcher.get_cache_info(book_id)
         if not cache_info.get("cached"):
-            # API에서 책 데이터 가져오기
-            book_data = await make_api_request("GET", f"/books/{book_id}/")
+            # API에서 책 데이터 가져오기 (가져오는 동안 무효화되면 저장하지 않도록 세대를 먼저 받아 둠)
+            generation = cache.generation(book_id)
+            book_data = await make_api_request("GET", BOOK_URL(book_id))
             if "error" in book_data:
                 return book_data
             
-            # 캐시에 저장
-            cache.save_book_data(book_id, book_data)
+            # 캐시 저장은 백그라운드 스레드에서 진행하고, 구조는 받은 데이터로 바로 추출
+            run_in_background(asyncio.to_thread(cache.save_book_data, book_id, book_data, generation))
+            cache_info = {
+                "book_subject": book_data.get("subject", ""),
+                "total_pages": count_pages(book_data.get("pages", [])),
+            }
         
         # 구조 추출
-        structure = searcher.get_book_structure(book_id, max_depth)
-        
-        # 최신 캐시 정보 가져오기
-        cache_info = searcher.get_cache_info(book_id)
+        structure = searcher.get_book_structure(book_id, max_depth, book_data=book_data)
         
         return {
             "book_id": book_id,
@@ -162,11 +486,56 @@ def register_book_tools(mcp_server):
 
     @mcp_server.tool(
         name="get_page",
-        description="주어진 페이지 ID로 페이지를 조회합니다."
+        description="주어진 페이지 ID로 페이지를 조회합니다. 페이지가 속한 책 ID(book_id)를 함께 전달하면 유효한 캐시가 있을 때 네트워크 요청 없이 캐시에서 반환합니다."
     )
-    async def get_page(page_id: int) -> Dict[str, Any]:
+    async def get_page(page_id: int, book_id: int = 0) -> Dict[str, Any]:
         """/napi/pages/{page_id} : 페이지를 조회합니다."""
-        return await make_api_request("GET", f"/pages/{page_id}/")
+        if book_id:
+            cached_page = get_book_cache().get_page(book_id, page_id)
+            if cached_page is not None:
+                return cached_page
+        
+        # 짧은 TTL 동안 같은 페이지 조회는 응답을 재사용 (수정 도구가 clear_response_cache로 비움)
+        fetched_at, result = await cached_api_get_entry(PAGE_URL(page_id))
+        if "error" not in result:
+            _remember_page(page_id, result, fetched_at)
+        return result
+
+
+    @mcp_server.tool(
+        name="batch_get_pages",
+        description="여러 페이지 ID를 한 번에 조회합니다. book_id를 함께 전달하면 유효한 캐시가 있을 때 네트워크 요청 없이 캐시에서 반환합니다."
+    )
+    async def batch_get_pages(page_ids: List[int], book_id: int = 0) -> Dict[str, Any]:
+        """여러 페이지를 동시에 조회"""
+        cached_pages: Dict[int, Dict[str, Any]] = {}
+        
+        # 캐시가 유효하면 캐시에서 먼저 찾기 (캐시 확인과 책 로드는 한 번만)
+        if book_id:
+            cached_pages = get_book_cache().get_pages(book_id, page_ids)
+        
+        # 중복 ID는 한 번만 요청
+        missing_ids = list(dict.fromkeys(pid for pid in page_ids if pid not in cached_pages))
+        fetched = await gather_with_limit(
+            PAGE_FETCH_CONCURRENCY,
+            *(make_api_request("GET", PAGE_URL(pid)) for pid in missing_ids)
+        )
+        fetched_pages = dict(zip(missing_ids, fetched))
+        
+        pages = []
+        errors = []
+        for pid in page_ids:
+            page = cached_pages.get(pid) or fetched_pages[pid]
+            if "error" in page:
+                errors.append({"page_id": pid, **page})
+            else:
+                pages.append(page)
+        
+        return {
+            "pages": pages,
+            "errors": errors,
+            "cached_count": sum(1 for pid in page_ids if pid in cached_pages)
+        }
 
 
     @mcp_server.tool(
@@ -195,7 +564,8 @@ def register_book_tools(mcp_server):
         
         # 성공 시 캐시 무효화 (다음 조회 시 새로 로드)
         if not result.get("error"):
-            get_book_cache().invalidate_book(book_id)
+            invalidate_book_cache(book_id)
+            clear_response_cache()
         
         return result
 
@@ -207,7 +577,8 @@ def register_book_tools(mcp_server):
             "`page_id`는 필수입니다. "
             "제목(`subject`), 내용(`content`), 부모 페이지 ID(`parent_id`), 또는 공개 여부(`open_yn`, Y 또는 N) 중 하나 이상을 반드시 전달해야 합니다. "
             "`old_str`/`new_str` 매개변수는 지원되지 않습니다. 전체 `content`를 전달하세요. "
-            "생략된 필드는 서버에 저장된 기존 값을 그대로 사용하게 됩니다."
+            "생략된 필드는 서버에 저장된 기존 값을 그대로 사용하게 됩니다. "
+            "네 필드를 모두 전달하면 기존 값 조회 없이 바로 저장하며, 변경 여부를 확인하려면 `check_changes`를 true로 설정하세요."
         )
     )
 
@@ -217,13 +588,17 @@ def register_book_tools(mcp_server):
         content:   str | None = None,
         parent_id: int | None = None,
         open_yn:   str | None = None,
+        check_changes: bool = False,
     ) -> dict[str, Any]:
         """
         PUT /napi/pages/{page_id}/
     
         Workflow
         --------
-        1. GET 현재 페이지 → diff 계산
+        1. 현재 페이지 확보 → diff 계산
+           - 몇 초 안에 조회·수정한 페이지면 GET 없이 그 값을 사용
+           - 네 필드를 모두 전달했으면 병합할 필요가 없으므로 GET 생략
+             (`check_changes=True`면 GET 후 diff를 계산해 NO_CHANGES 확인)
         2. current 복사 후 전달된 파라미터만 덮어써 updated 생성
            (→ 결과적으로 **모든 필드**가 포함된 완전한 페이로드)
         3. 변경 사항 없으면 {"error": "NO_CHANGES"} 반환
@@ -235,45 +610,70 @@ def register_book_tools(mcp_server):
         - 미전달 필드는 **기존 값으로 채워져** 서버에 그대로 남습니다.
         - 파라미터를 하나도 바꾸지 않으면 PUT 호출을 생략해 네트워크 트래픽을 절약합니다.
         """
-
-        # 1) 현재 상태 조회
-        current = await make_api_request("GET", f"/pages/{page_id}/")
-        if "error" in current:
-            return current        # 404·권한 오류 등 그대로 반환
-    
-       # 2) diff → payload 만들기
-        payload = {
-            "id":        page_id,                 # 필수
-            "subject":   subject   if subject   is not None else current["subject"],
-            "content":   content   if content   is not None else current["content"],
-            "parent_id": parent_id if parent_id is not None else current["parent_id"],
-            "open_yn":   open_yn   if open_yn   is not None else current["open_yn"],
-            "book_id":   current["book_id"],      # 명세상 필요 (0 으로 줘도 되지만 안전하게)
-        }
-     
-        delta_fields = [
-            k for k in ("subject", "content", "parent_id", "open_yn")
-            if payload[k] != current[k]
-        ]
-
-        if not delta_fields:
-            return {
-                "error": "NO_CHANGES",
-                "message": "변경된 값이 없습니다. 수정할 항목을 하나 이상 넣어 주세요."
-            }
-    
-        # 3) PUT
-        result = await put_page(page_id, payload)
+        result, book_id = await _update_page(page_id, subject, content, parent_id, open_yn, check_changes)
     
         # 4) 캐시 무효화
         if "error" not in result:
-            get_book_cache().invalidate_book(current["book_id"])
+            if book_id:
+                invalidate_book_cache(book_id)
+            else:
+                await invalidate_page_books(page_id)
+            clear_response_cache()
     
-        # 5) 바뀐 필드 정보 반환 (UX 용)
-        result["updated_fields"] = delta_fields
         return result
 
 
+    @mcp_server.tool(
+        name="batch_update_pages",
+        description=(
+            "여러 페이지를 한 번에 수정합니다. "
+            "`updates`의 각 항목은 `page_id`와 함께 `subject`, `content`, `parent_id`, `open_yn` 중 바꿀 필드를 담은 딕셔너리입니다. "
+            "각 항목은 `update_page`와 같은 규칙으로 처리되며, 요청은 동시에 전송됩니다. "
+            "같은 페이지를 수정하는 항목이 여러 개면 입력 순서대로 차례로 적용됩니다. "
+            "페이지 간 순서가 중요한 수정(예: 부모 페이지 이동)에는 `update_page`를 차례로 사용하세요."
+        )
+    )
+    async def batch_update_pages(updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """여러 페이지를 동시에 수정하고, 영향받은 책 캐시는 마지막에 한 번씩만 무효화"""
+        async def run(item: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[int]]:
+            page_id = item.get("page_id")
+            if not page_id:
+                return {"error": "Missing page_id", "item": item}, None
+            result, book_id = await _update_page(
+                page_id,
+                item.get("subject"),
+                item.get("content"),
+                item.get("parent_id"),
+                item.get("open_yn"),
+                bool(item.get("check_changes")),
+            )
+            return {"page_id": page_id, **result}, book_id
+
+        # 같은 페이지 항목은 차례로 적용 (결과는 입력 순서 유지)
+        outcomes = await gather_by_page(updates, run)
+
+        results = [result for result, _ in outcomes]
+        book_ids = {book_id for result, book_id in outcomes if book_id and "error" not in result}
+        # 책을 알 수 없는 페이지는 그 페이지가 들어 있는 책 캐시를 모두 무효화
+        unknown_page_ids = {
+            result["page_id"] for result, book_id in outcomes if not book_id and "error" not in result
+        }
+        updated_count = sum(1 for result in results if "error" not in result)
+
+        if updated_count:
+            for book_id in book_ids:
+                invalidate_book_cache(book_id)
+            for page_id in unknown_page_ids:
+                await invalidate_page_books(page_id)
+            clear_response_cache()
+
+        return {
+            "updated_count": updated_count,
+            "error_count": len(results) - updated_count,
+            "results": results
+        }
+
+
     @mcp_server.tool(
         name="upload_page_image",
         description="페이지용 이미지를 업로드합니다. page_id와 이미지 파일 경로(file_path)가 필요합니다."
@@ -290,143 +690,7 @@ def register_book_tools(mcp_server):
     )
     async def get_wikidocs_formatting_guide() -> str:
         """위키독스 책 페이지 포매팅 가이드를 반환"""
-        return """# 위키독스 책 페이지 포매팅 가이드
-
-## 🚨 핵심 주의사항
-
-### 1. 헤딩 규칙 (매우 중요!)
-- 내용 작성 시 **H1 태그 사용 금지!** → H2(##) 또는 H3(###)부터 시작
-- 이유: H1은 전자책 변환 시 자동으로 챕터로 인식됨
-- H2에는 자동으로 밑줄이 적용됨
-- 계층 구조: `## → ### → ####` 순서로 사용
-- 페이지 제목을 첫 번째 줄에 작성할 경우 제목이 중복으로 표시되므로, 페이지 제목 없이 페이지 도입부 또는 섹션 제목으로 내용을 시작하는 것이 좋습니다.
-
-### 2. 리스트 작성 규칙
-- **본문 뒤 리스트 작성 시 반드시 공백 한 줄 삽입**
-```
-본문 내용입니다.
-
-- 리스트 항목 1
-- 리스트 항목 2
-```
-
-- **중첩 리스트**: 하위 항목은 4칸 들여쓰기
-```
-- 상위 항목
-    - 하위 항목 (4칸 들여쓰기)
-    - 하위 항목 2
-```
-
-### 3. 코드 블록 규칙
-**본문 뒤 코드 블록 작성 시 반드시 공백 한 줄 삽입**
-
-**일반 코드**: 백쿼트 3개 또는 4칸 들여쓰기
-
-```python
-# 일반 코드 블록
-def example():
-    return "hello"
-```
-
-**⚠️ 리스트 내 코드**: 백쿼트 불가! 반드시 8칸 들여쓰기
-
-```
-- 설명
-        # 리스트 내 코드는 8칸 들여쓰기만 가능
-        def list_code():
-            return "example"
-```
-
-### 4. 그 밖의 특이 사항
-- 물결표(tilde)가 일반 문자열로 인식되므로 앞에 백슬래시를 넣지 마세요.
-- 특수 기호(볼드체를 위한 asterisk, 이스케이프를 뜻하는 백슬래시 등)를 실수로 이스케이프하여 렌더링 결과에 그대로 노출하지 않게 유의하세요.
-
-
-## 🎨 위키독스 전용 특수 기능
-
-**팁 블록**
-
-[[TIP]]
-**팁 블록에 대하여**
-
-도움말이나 팁을 설명하는 블록을 작성할 수 있습니다.  
-팁 블록 위의 섹션 제목과 팁 블록 사이에 적절한 맥락을 제공해야 구조적으로 어색하지 않습니다.
-팁 블록 내에서는 일부 마크다운 렌더링이 작동하지 않습니다. 예를 들어, 팁 블록 제목은 **굵은 글씨**로 표시하세요.
-[[/TIP]]
-
-**사용자 정의 팁 블록**
-
-[[TIP("알아두기")]]
-**팁 블록에 대하여**
-
-도움말이나 팁을 설명하는 블록을 작성할 수 있습니다.
-[[/TIP]]
-
-**목차 자동생성 (해당 위치에 목차가 생성됨. 가급적 처음 제목이 나오기 전에 넣는 것이 구조상 논리적임)**
-
-[TOC]
-
-**코드 블록 내 강조**
-
-```python
-def sum(a, b):
-    [[MARK]]return a+b[[/MARK]]
-```
-
-**코드 블록 내 삭제 표시**
-
-```python
-def sum(a, b):
-    [[SMARK]]return a+b[[/SMARK]]
-```
-
-**용어 링크**
-
-[["용어명"]]
-
-
-## 🖼️ 이미지 처리
-- **기본**: `![alt텍스트](이미지URL)`
-- **가운데 정렬**:
-```html
-<p align="center">
-<img src="이미지URL" alt="설명">
-</p>
-```
-- **⚠️ 전자책 판매용**: img 태그 사용 금지 (PDF 호환성 문제)
-
-## 🧮 수식 표현 (MathJax)
-- **블록 수식**: `$$수식$$`
-- **인라인 수식**: `$수식$` (⚠️ 공백 없이! 매우 중요)
-- **줄바꿈**: `\\\\` 사용
-- **정렬**: `\\begin{aligned}` 환경 활용
-
-### 수식 예시
-```
-$$
-\\begin{aligned}
-f(x) &= ax^2 + bx + c \\\\
-&= a(x + \\frac{b}{2a})^2 + c - \\frac{b^2}{4a}
-\\end{aligned}
-$$
-```
-
-## 📺 미디어 삽입
-### 유튜브 동영상
-```html
-<style>.embed-container { position: relative; padding-bottom: 56.25%; height: 0; overflow: hidden; max-width: 100%; } .embed-container iframe, .embed-container object, .embed-container embed { position: absolute; top: 0; left: 0; width: 100%; height: 100%; }</style><div class='embed-container'><iframe src='https://www.youtube.com/embed/동영상ID' frameborder='0' allowfullscreen></iframe></div>
-```
-
-## ✅ 체크리스트
-
-책 페이지 작성 전 반드시 확인:
-- [ ] H1 태그 사용하지 않았는가?
-- [ ] 본문 뒤 리스트에 공백 한 줄 넣었는가?
-- [ ] 리스트 내 코드를 8칸 들여쓰기로 작성했는가?
-- [ ] 수식에서 $ 기호 앞뒤에 공백을 넣지 않았는가?
-- [ ] 전자책용이면 HTML 태그를 피했는가?
-
-이 가이드를 따라야 위키독스에서 올바르게 렌더링됩니다!"""
+        return _FORMATTING_GUIDE
 
 
 
@@ -448,26 +712,22 @@ $$
                      (선택 사항: "old_number"는 서버가 조회하므로 생략 가능, "new_subject"가 있으면 제목도 함께 변경됨)
             dry_run: True이면 실제 변경 없이 diff만 반환 (기본값 True)
         """
-        results = []
-        
-        for item in changes:
+        async def run(item: Dict[str, Any]) -> Dict[str, Any]:
             page_id = item.get('page_id')
             old_num = item.get('old_number')
             new_num = item.get('new_number')
             new_subject_input = item.get('new_subject')
             
             if not page_id:
-                results.append({"error": "Missing page_id", "item": item})
-                continue
+                return {"error": "Missing page_id", "item": item}
 
             # 페이지 상세 내용 가져오기 (old_number가 없거나 검증을 위해 필요)
-            page_detail = await make_api_request("GET", f"/pages/{page_id}/")
+            page_detail = await make_api_request("GET", PAGE_URL(page_id))
             if "error" in page_detail:
-                results.append({
+                return {
                     "page_id": page_id,
                     "error": "페이지 정보를 가져오는데 실패했습니다."
-                })
-                continue
+                }
                 
             current_subject = page_detail['subject']
             current_content = page_detail['content']
@@ -480,63 +740,68 @@ $$
                 new_num = renumber_utils.get_page_number(new_subject_input)
                 
             if not old_num or not new_num:
-                results.append({
+                return {
                     "page_id": page_id,
                     "error": "페이지 번호를 식별할 수 없습니다.",
                     "current_subject": current_subject,
                     "input_item": item
-                })
-                continue
+                }
             
             new_subject, new_content, changed = renumber_utils.apply_renumbering(
                 current_subject, current_content, old_num, new_num
             )
             
-            if changed:
-                if dry_run:
-                    # Diff 생성
-                    diff = renumber_utils.generate_diff(
-                        f"Subject: {current_subject}\n\n{current_content}",
-                        f"Subject: {new_subject}\n\n{new_content}",
-                        filename=f"Page {page_id}"
-                    )
-                    results.append({
-                        "page_id": page_id,
-                        "old_number": old_num,
-                        "new_number": new_num,
-                        "diff": diff
-                    })
-                else:
-                    # 실제 업데이트
-                    update_data = {
-                        "id": page_id,
-                        "subject": new_subject,
-                        "content": new_content,
-                        "book_id": book_id
-                    }
-                    res = await put_page(page_id, update_data)
-                    if "error" not in res:
-                        results.append({
-                            "page_id": page_id,
-                            "status": "updated",
-                            "old_number": old_num,
-                            "new_number": new_num
-                        })
-                    else:
-                         results.append({
-                            "page_id": page_id,
-                            "error": res.get("message", "Update failed")
-                        })
-            else:
-                results.append({
+            if not changed:
+                return {
                     "page_id": page_id,
                     "status": "skipped",
                     "reason": "No changes detected via regex"
-                })
+                }
+                
+            if dry_run:
+                # Diff 생성 (긴 본문을 제목과 이어 붙이지 않고 줄 목록으로 바로 전달)
+                diff = renumber_utils.generate_diff(
+                    f"Subject: {current_subject}\n".splitlines() + [""] + current_content.splitlines(),
+                    f"Subject: {new_subject}\n".splitlines() + [""] + new_content.splitlines(),
+                    filename=f"Page {page_id}"
+                )
+                return {
+                    "page_id": page_id,
+                    "old_number": old_num,
+                    "new_number": new_num,
+                    "diff": diff
+                }
+                
+            # 실제 업데이트
+            update_data = {
+                "id": page_id,
+                "subject": new_subject,
+                "content": new_content,
+                "book_id": book_id
+            }
+            _recent_pages.pop(page_id, None)
+            res = await put_page(page_id, update_data)
+            if "error" in res:
+                return {
+                    "page_id": page_id,
+                    "error": res.get("message", "Update failed")
+                }
+            return {
+                "page_id": page_id,
+                "status": "updated",
+                "old_number": old_num,
+                "new_number": new_num
+            }
+        
+        # 페이지마다 조회+수정이 독립적이므로 동시에 처리 (결과는 입력 순서 유지)
+        # 같은 페이지가 여러 번 있으면 앞의 수정이 저장된 뒤 다시 조회해 적용
+        results = await gather_by_page(changes, run)
+        
         
         # 캐시 무효화
         if not dry_run and results:
-            get_book_cache().invalidate_book(book_id)
+            invalidate_book_cache(book_id)
+            clear_response_cache()
             
         return {
             "book_id": book_id,
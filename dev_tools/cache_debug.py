@@ -6,49 +6,62 @@
 import os
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 모듈 사용
+    orjson = None
+
 def find_cache_directory():
     """캐시 디렉터리 찾기"""
     home_dir = os.path.expanduser("~")
     cache_dir = os.path.join(home_dir, ".wikidocs_mcp_cache")
     return cache_dir
 
-def analyze_cache_file(cache_file):
-    """캐시 파일 분석"""
+def scan_cache_files(cache_dir, suffix=""):
+    """캐시 디렉터리의 book_* 파일 목록 (DirEntry, 디렉터리를 읽을 때 얻은 stat 정보 재사용)"""
+    with os.scandir(cache_dir) as it:
+        return [e for e in it if e.name.startswith("book_") and e.name.endswith(suffix)]
+
+def analyze_cache_file(cache_file, out=print):
+    """캐시 파일 분석 (out으로 결과 줄을 출력)"""
     try:
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(cache_file, 'rb') as f:
+            raw = f.read()
+        # orjson.JSONDecodeError는 json.JSONDecodeError의 하위 클래스
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         
-        print(f"\n📄 파일: {os.path.basename(cache_file)}")
-        print(f"   크기: {os.path.getsize(cache_file)} bytes")
+        out(f"\n📄 파일: {os.path.basename(cache_file)}")
+        out(f"   크기: {len(raw)} bytes")
         
         if isinstance(data, dict):
-            print(f"   키: {list(data.keys())}")
+            out(f"   키: {list(data.keys())}")
             if 'pages' in data:
                 pages = data['pages']
                 if isinstance(pages, list):
-                    print(f"   페이지 수: {len(pages)}")
+                    out(f"   페이지 수: {len(pages)}")
                     if pages:
                         first_page = pages[0]
                         if isinstance(first_page, dict):
-                            print(f"   첫 페이지 키: {list(first_page.keys())}")
+                            out(f"   첫 페이지 키: {list(first_page.keys())}")
                         else:
-                            print(f"   ❌ 첫 페이지가 dict가 아님: {type(first_page)}")
+                            out(f"   ❌ 첫 페이지가 dict가 아님: {type(first_page)}")
                 else:
-                    print(f"   ❌ pages가 list가 아님: {type(pages)}")
+                    out(f"   ❌ pages가 list가 아님: {type(pages)}")
             else:
-                print("   ❌ pages 키가 없음")
+                out("   ❌ pages 키가 없음")
         else:
-            print(f"   ❌ 데이터가 dict가 아님: {type(data)}")
+            out(f"   ❌ 데이터가 dict가 아님: {type(data)}")
             
         return True
         
     except json.JSONDecodeError as e:
-        print(f"   ❌ JSON 파싱 오류: {e}")
+        out(f"   ❌ JSON 파싱 오류: {e}")
         return False
     except Exception as e:
-        print(f"   ❌ 파일 읽기 오류: {e}")
+        out(f"   ❌ 파일 읽기 오류: {e}")
         return False
 
 def clear_cache(cache_dir, book_id=None):
@@ -68,9 +81,7 @@ def clear_cache(cache_dir, book_id=None):
                 files_to_remove.append(file_path)
     else:
         # 모든 캐시 삭제
-        for file in os.listdir(cache_dir):
-            if file.startswith("book_") and file.endswith((".json")):
-                files_to_remove.append(os.path.join(cache_dir, file))
+        files_to_remove = [e.path for e in scan_cache_files(cache_dir, ".json")]
     
     if not files_to_remove:
         print("삭제할 캐시 파일이 없습니다.")
@@ -104,7 +115,7 @@ def main():
                 print("❌ 캐시 디렉터리가 존재하지 않습니다.")
                 return
             
-            cache_files = [f for f in os.listdir(cache_dir) if f.startswith("book_") and f.endswith(".json")]
+            cache_files = scan_cache_files(cache_dir, ".json")
             
             if not cache_files:
                 print("📭 캐시 파일이 없습니다.")
@@ -112,11 +123,18 @@ def main():
             
             print(f"🔍 {len(cache_files)}개의 캐시 파일 분석 중...")
             
+            # 파일 읽기와 파싱을 스레드로 동시에 진행하고, 출력은 파일별로 모아 이름 순으로 출력
+            def analyze(entry):
+                lines = []
+                return analyze_cache_file(entry.path, out=lines.append), lines
+            
+            cache_files.sort(key=lambda e: e.name)
             corrupted_files = []
-            for cache_file in sorted(cache_files):
-                file_path = os.path.join(cache_dir, cache_file)
-                if not analyze_cache_file(file_path):
-                    corrupted_files.append(cache_file)
+            with ThreadPoolExecutor(max_workers=min(16, len(cache_files))) as executor:
+                for entry, (ok, lines) in zip(cache_files, executor.map(analyze, cache_files)):
+                    print("\n".join(lines))
+                    if not ok:
+                        corrupted_files.append(entry.name)
             
             if corrupted_files:
                 print(f"\n❌ 손상된 파일: {len(corrupted_files)}개")
@@ -140,12 +158,10 @@ def main():
         elif command == "info":
             print(f"📂 캐시 디렉터리: {cache_dir}")
             if os.path.exists(cache_dir):
-                cache_files = [f for f in os.listdir(cache_dir) if f.startswith("book_")]
+                cache_files = scan_cache_files(cache_dir)
                 print(f"📄 캐시 파일 수: {len(cache_files)}")
                 
-                total_size = 0
-                for f in cache_files:
-                    total_size += os.path.getsize(os.path.join(cache_dir, f))
+                total_size = sum(e.stat().st_size for e in cache_files)
                 
                 print(f"💾 총 크기: {total_size:,} bytes ({total_size/1024/1024:.2f} MB)")
             else:
@@ -0,0 +1,63 @@
+import sys
+import importlib.util
+from typing import Optional
+import httpx
+
+# --- 공유 HTTP 클라이언트 설정 ---
+# 모든 도구 호출이 하나의 커넥션 풀을 재사용하도록 프로세스 전역 클라이언트를 둡니다.
+# (호출마다 클라이언트를 만들면 매번 TCP+TLS 핸드셰이크 비용이 발생합니다.)
+# 유휴 연결은 30초 동안 유지하고, 연결 수립은 5초 안에 실패하도록 따로 제한합니다.
+# 일괄 도구 한 번이 동시에 보내는 최대 요청 수 (book_tools의 동시 조회·수정 수가 이 값을 따름)
+MAX_CONCURRENT_REQUESTS = 16
+HTTP_LIMITS = httpx.Limits(
+    # 일괄 요청이 끝난 뒤에도 그만큼의 연결을 남겨 두어 다음 일괄 요청이 핸드셰이크 없이 재사용
+    max_keepalive_connections=MAX_CONCURRENT_REQUESTS,
+    # 일괄 도구 호출 몇 개가 겹쳐도 연결을 기다리지 않도록 여유를 둠
+    max_connections=MAX_CONCURRENT_REQUESTS * 4,
+    keepalive_expiry=30.0,
+)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# HTTP/2는 h2 패키지가 설치된 경우에만 사용합니다. (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_client: Optional[httpx.AsyncClient] = None
+
+def get_client() -> httpx.AsyncClient:
+    """공유 httpx.AsyncClient 인스턴스 반환 (지연 초기화)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=HTTP_LIMITS,
+            timeout=HTTP_TIMEOUT,
+            http2=HTTP2_AVAILABLE,
+        )
+    return _client
+
+def set_client(client: Optional[httpx.AsyncClient]) -> None:
+    """
+    공유 클라이언트를 교체합니다. (테스트에서 httpx.MockTransport를 쓰는 클라이언트 주입용)
+    
+    None을 주면 다음 get_client() 호출 시 기본 설정으로 새로 만듭니다.
+    """
+    global _client
+    _client = client
+
+async def warm_up_client(url: str) -> None:
+    """
+    서버 시작 직후 DNS 조회와 TCP+TLS 연결을 미리 해 둡니다.
+    
+    첫 도구 호출이 핸드셰이크 비용을 치르지 않도록 커넥션 풀에 연결을 하나
+    만들어 둡니다. 실패해도 실제 요청 시 다시 연결하므로 무시합니다.
+    """
+    try:
+        await get_client().head(url, timeout=5.0)
+    except Exception as e:
+        print(f"Warning: HTTP connection warm-up failed: {e}", file=sys.stderr)
+
+async def close_client() -> None:
+    """공유 클라이언트의 커넥션 풀을 정리합니다. (서버 종료 시 호출)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,11 +1,28 @@
+import sys
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+import anyio
 from fastmcp import FastMCP
 from book_tools import register_book_tools
 from blog_tools import register_blog_tools
+from http_client import warm_up_client, close_client
+from utils import WIKIDOCS_API_URL
 
-# --- MCP 서버 인스턴스 생성 ---
-mcp_server = FastMCP(
-    name="Wikidocs MCP Server",
-    instructions="""이 서버는 위키독스 책과 블로그 콘텐츠를 조회하고 수정하는 기능을 제공합니다.
+# --- 서버 수명 주기 ---
+@asynccontextmanager
+async def lifespan(server):
+    """시작 시 API 서버 연결을 미리 열고, 종료 시 공유 HTTP 클라이언트의 커넥션 풀을 정리"""
+    # 첫 도구 호출을 지연시키지 않도록 백그라운드에서 연결
+    warm_up = asyncio.create_task(warm_up_client(WIKIDOCS_API_URL))
+    try:
+        yield {}
+    finally:
+        warm_up.cancel()
+        await close_client()
+
+# --- 서버 안내문 ---
+INSTRUCTIONS = """이 서버는 위키독스 책과 블로그 콘텐츠를 조회하고 수정하는 기능을 제공합니다.
 
 중요 사용 가이드:
 - 책에 새 페이지를 추가할 때는 `create_page`를 사용하고, `update_page`는 기존 페이지를 수정할 때만 사용하세요.
@@ -18,6 +35,12 @@ mcp_server = FastMCP(
 참고:
 - 책의 페이지 ID는 책 내에서뿐 아니라 위키독스에서 글로벌하게 고유합니다.
 - 블로그와 책은 렌더링 방식이 다르므로 포매팅 가이드는 책에만 적용합니다."""
+
+# --- MCP 서버 인스턴스 생성 ---
+mcp_server = FastMCP(
+    name="Wikidocs MCP Server",
+    instructions=INSTRUCTIONS,
+    lifespan=lifespan
 )
 
 # --- 도구 등록 ---
@@ -31,5 +54,7 @@ if __name__ == "__main__":
     # 모든 도구 등록
     register_all_tools()
     
-    # 서버 실행 (transport 인자 없이 run()을 호출하여 기본값인 'stdio'로 실행)
-    mcp_server.run()
+    # 서버 실행 (transport 인자 없이 실행하여 기본값인 'stdio'로 실행)
+    # uvloop가 설치되어 있으면 더 빠른 이벤트 루프를 사용 (Windows 미지원)
+    use_uvloop = sys.platform != "win32" and importlib.util.find_spec("uvloop") is not None
+    anyio.run(mcp_server.run_async, backend_options={"use_uvloop": use_uvloop})
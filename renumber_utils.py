@@ -1,13 +1,26 @@
 import re
 import difflib
-from typing import List, Dict, Any, Tuple, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Optional, Union
 
+# 제목 앞의 섹션 번호 (예: "5.2.1")
+_NUM_RE = re.compile(r'^(\d+(?:\.\d+)*)')
+# 마크다운 헤더 뒤의 번호 (old_number와 상관없이 한 번만 컴파일)
+_HEADER_LEADING_NUM = re.compile(r'^(#+\s+)([\d.]+)', re.MULTILINE)
+
+def _starts_with_number(text: str, number: str) -> bool:
+    """text가 number로 시작하고 그 뒤에 숫자가 이어지지 않는지 확인 (예: 5.2는 5.2.1과 맞지만 5.20과는 안 맞음)"""
+    return text.startswith(number) and not text[len(number):len(number) + 1].isdecimal()
+
+@lru_cache(maxsize=4096)
 def get_page_number(subject: str) -> Optional[str]:
     """
     페이지 제목에서 섹션 번호를 추출합니다.
     예: "5.2. 설치하기" -> "5.2"
+    
+    계획 수립 중 같은 제목을 여러 번 조회하므로 결과를 캐시합니다.
     """
-    match = re.match(r'^(\d+(?:\.\d+)*)', subject.strip())
+    match = _NUM_RE.match(subject.strip())
     if match:
         return match.group(1)
     return None
@@ -40,6 +53,26 @@ def replace_prefix(number: str, old_prefix: str, new_prefix: str) -> str:
         return new_prefix + number[len(old_prefix):]
     return number
 
+def _index_tree(pages: List[Dict[str, Any]]) -> Tuple[Dict[int, Dict], Dict[int, Optional[Dict]]]:
+    """
+    책 트리를 한 번만 순회하여 두 인덱스를 만듭니다.
+    Returns: (page_id -> 페이지, page_id -> 부모 페이지 (최상위 페이지는 None))
+    """
+    id_to_page: Dict[int, Dict] = {}
+    id_to_parent: Dict[int, Optional[Dict]] = {}
+    stack = [(page, None) for page in reversed(pages)]
+    
+    while stack:
+        page, parent = stack.pop()
+        # ID가 중복되면 목차 순서상 먼저 나온 페이지 사용
+        id_to_page.setdefault(page['id'], page)
+        id_to_parent.setdefault(page['id'], parent)
+        children = page.get('children')
+        if children:
+            stack.extend((child, page) for child in reversed(children))
+    
+    return id_to_page, id_to_parent
+
 def find_target_pages(book_data: Dict[str, Any], start_page_id: int) -> List[Dict[str, Any]]:
     """
     재귀적으로 책 구조를 탐색하여
@@ -83,7 +116,7 @@ def find_target_pages(book_data: Dict[str, Any], start_page_id: int) -> List[Dic
     # 3. 그 인덱스부터 끝까지가 "밀어야 할 형제들"이다.
     # 4. 각 형제와 그 자손들을 모두 수집한다.
     
-    parent = find_parent(book_data['pages'], start_page_id)
+    parent = _index_tree(book_data['pages'])[1].get(start_page_id)
     siblings = []
     
     if parent:
@@ -112,22 +145,21 @@ def find_target_pages(book_data: Dict[str, Any], start_page_id: int) -> List[Dic
     return final_targets
 
 def find_parent(pages: List[Dict], target_id: int) -> Optional[Dict]:
-    """재귀적으로 부모 페이지를 찾습니다."""
-    for page in pages:
-        for child in page.get('children', []):
-            if child['id'] == target_id:
-                return page
-            # 깊이 우선 탐색
-            found = find_parent([child], target_id)
-            if found:
-                return found
-    return None
+    """
+    부모 페이지를 찾습니다. (최상위 페이지이거나 없으면 None)
+    여러 번 찾을 때는 _index_tree로 인덱스를 한 번 만들어 사용하세요.
+    """
+    return _index_tree(pages)[1].get(target_id)
 
 def add_page_and_descendants(page: Dict, result_list: List[Dict]):
-    """페이지와 그 자손들을 리스트에 추가합니다."""
-    result_list.append(page)
-    for child in page.get('children', []):
-        add_page_and_descendants(child, result_list)
+    """페이지와 그 자손들을 리스트에 추가합니다. (목차 순서)"""
+    stack = [page]
+    while stack:
+        node = stack.pop()
+        result_list.append(node)
+        children = node.get('children')
+        if children:
+            stack.extend(reversed(children))
 
 def apply_renumbering(
     subject: str, 
@@ -141,40 +173,51 @@ def apply_renumbering(
     """
     changed = False
     new_subject = subject
-    new_content = content
     
     # 1. 제목 치환
     # 예: "5.2. 설치" -> "5.3. 설치"
     # 주의: 단순 replace가 아니라 맨 앞부분만 교체해야 함
-    if subject.strip().startswith(old_number):
-        # 정확히 old_number 뒤에 점이나 공백이 오는지 확인하여 오탐 방지 (예: 5.2가 5.21을 매칭하지 않도록)
-        # 하지만 보통 "5.2." 또는 "5.2 " 형태임.
-        # 정규식 사용: ^(old_number)(?=\D|$)
-        pattern = re.compile(r'^' + re.escape(old_number) + r'(?=\D|$)')
-        if pattern.match(subject.strip()):
-            new_subject = pattern.sub(new_number, subject.strip(), count=1)
-            changed = True
+    # 정확히 old_number 뒤에 숫자가 아닌 문자가 오는지 확인하여 오탐 방지 (예: 5.2가 5.21을 매칭하지 않도록)
+    # 보통 "5.2." 또는 "5.2 " 형태임. 번호마다 정규식을 만들지 않고 문자열 비교로 확인
+    stripped = subject.strip()
+    if _starts_with_number(stripped, old_number):
+        new_subject = new_number + stripped[len(old_number):]
+        changed = True
 
     # 2. 본문 헤더 치환
     # 마크다운 헤더 (#, ##, ### 등) 뒤에 오는 번호 치환
-    # 예: "## 5.2. 설치" -> "## 5.3. 설치"
-    # 멀티라인 모드 사용
-    header_pattern = re.compile(
-        r'^(#+\s+)' + re.escape(old_number) + r'(?=\D|$)', 
-        re.MULTILINE
-    )
+    # 예: "## 5.2. 설치" -> "## 5.3. 설치", "### 5.2.1 설치" -> "### 5.3.1 설치"
+    # 멀티라인 모드 사용 (공용 패턴 하나로 한 번만 훑음)
+    count = 0
+    
+    def replace_header(m: "re.Match") -> str:
+        nonlocal count
+        number = m.group(2)
+        if not _starts_with_number(number, old_number):
+            return m.group(0)
+        count += 1
+        return m.group(1) + new_number + number[len(old_number):]
     
-    if header_pattern.search(content):
-        new_content = header_pattern.sub(r'\g<1>' + new_number, content)
+    # 헤더가 없는 본문은 정규식 없이 건너뜀 ('#' 검색이 정규식보다 훨씬 가벼움)
+    new_content = _HEADER_LEADING_NUM.sub(replace_header, content) if '#' in content else content
+    if count:
         changed = True
         
     return new_subject, new_content, changed
 
-def generate_diff(original: str, modified: str, filename: str = "text") -> str:
-    """diff 문자열을 생성합니다."""
+def generate_diff(
+    original: Union[str, List[str]], 
+    modified: Union[str, List[str]], 
+    filename: str = "text"
+) -> str:
+    """diff 문자열을 생성합니다. (이미 나눈 줄 목록을 주면 다시 나누지 않음)"""
+    if isinstance(original, str):
+        original = original.splitlines()
+    if isinstance(modified, str):
+        modified = modified.splitlines()
     diff = difflib.unified_diff(
-        original.splitlines(), 
-        modified.splitlines(), 
+        original, 
+        modified, 
         fromfile=f"Original {filename}", 
         tofile=f"Modified {filename}",
         lineterm=""
@@ -190,38 +233,28 @@ def create_renumbering_plan(
     변경 계획을 수립하여 반환합니다.
     형제 노드들을 순차적으로 재번호화하여 중복을 해결합니다.
     """
-    # 1. 대상 페이지 찾기 (start_page_id와 그 이후의 형제들, 그리고 그 자손들)
-    # 주의: find_target_pages는 "start_page_id"를 포함하여 그 뒤의 모든 형제들을 찾음.
-    # 하지만 "중복된 번호"가 있을 때, start_page_id가 "첫 번째 5.2"인지 "두 번째 5.2"인지에 따라
-    # targets 리스트가 달라짐. find_target_pages는 ID 기반이므로 정확함.
-    targets = find_target_pages(book_data, start_page_id)
-    
-    if not targets:
-        return []
-        
-    # 2. 형제 노드 식별 및 순서 파악
-    parent = find_parent(book_data['pages'], start_page_id)
-    all_siblings = []
+    # 1. 형제 노드 식별 및 순서 파악 (트리 인덱스로 한 번에)
+    # start_page_id는 ID 기반이므로 "중복된 번호"가 있어도 어느 페이지부터 밀지 정확함.
+    # 자손은 아래 변경 계획 수립 단계에서 형제별로 내려가며 처리하므로 별도로 모으지 않음.
+    parent = _index_tree(book_data['pages'])[1].get(start_page_id)
     if parent:
         all_siblings = parent.get('children', [])
     else:
         all_siblings = book_data.get('pages', [])
-        
-    # targets에 포함된 페이지들 중 "형제 노드"만 골라내기 (순서 유지)
-    # find_target_pages는 형제+자손을 섞어서 반환할 수 있으므로(구현에 따라 다름),
-    # all_siblings에서 targets에 있는 것들을 순서대로 추출하는 것이 안전함.
     
-    target_ids = {p['id'] for p in targets}
-    target_siblings = [p for p in all_siblings if p['id'] in target_ids]
-    
-    # 3. 시작 번호 결정
-    # start_page_id의 바로 앞 형제의 번호를 확인하여 기준점 설정
+    # 2. start_page_id와 그 이후의 형제들 (순서 유지)
     start_index = -1
     for i, p in enumerate(all_siblings):
         if p['id'] == start_page_id:
             start_index = i
             break
-            
+    
+    if start_index == -1:
+        return []
+    target_siblings = all_siblings[start_index:]
+    
+    # 3. 시작 번호 결정
+    # start_page_id의 바로 앞 형제의 번호를 확인하여 기준점 설정
     base_number_parts = []
     
     if start_index > 0:
@@ -380,12 +413,25 @@ def create_descendant_plan(
     자손 페이지들의 번호를 부모의 변경된 번호에 맞춰 업데이트합니다.
     """
     plan = []
-    for page in pages:
-        page_id = page['id']
+    # 부모 번호가 그대로면 자손 번호도 바뀌지 않음
+    if parent_old_number == parent_new_number:
+        return plan
+    
+    # 자손의 번호도 최상위 변경점(parent_old_number)의 접두사만 바꾸면 되므로
+    # 같은 parent_old/new로 목차 순서대로 순회 (번호가 맞지 않는 페이지의 하위 트리는 건너뜀)
+    # 예: 5.2를 5.3으로 -> 5.2.1 -> 5.3.1, 5.2.1.1 -> 5.3.1.1
+    prefix = parent_old_number + "."
+    stack = list(reversed(pages))
+    while stack:
+        page = stack.pop()
         subject = page['subject']
+        # 제목이 접두사로 시작하지 않으면 정규식 없이 하위 트리째 건너뜀
+        if not subject.lstrip().startswith(prefix):
+            continue
+        page_id = page['id']
         old_number = get_page_number(subject)
         
-        if old_number and old_number.startswith(parent_old_number + "."):
+        if old_number and old_number.startswith(prefix):
             new_number = replace_prefix(old_number, parent_old_number, parent_new_number)
             
             if new_number != old_number:
@@ -395,18 +441,9 @@ def create_descendant_plan(
                     "old_number": old_number,
                     "new_number": new_number
                 })
-                
-            # 재귀 호출 (자손의 자손)
-            # 주의: 여기서 parent_old_number는 현재 페이지의 old_number가 되어야 함?
-            # 아니요, replace_prefix는 "맨 앞의 prefix"만 바꿉니다.
-            # 5.2.1.1 -> 5.2를 5.3으로 -> 5.3.1.1
-            # 따라서 재귀적으로 내려갈 때도 "최상위 변경점"인 parent_old_number를 계속 써도 됨.
-            # 하지만 안전하게 하려면, 현재 페이지의 바뀐 번호를 기준으로 하는 게 나을 수도?
-            # replace_prefix 함수는 "5.2.1"에서 "5.2"를 "5.3"으로 바꿈.
-            # 그 자식 "5.2.1.1"에서도 "5.2"를 "5.3"으로 바꾸면 됨.
-            # 즉, parent_old/new를 그대로 전달해도 됨.
             
-            if 'children' in page:
-                plan.extend(create_descendant_plan(page['children'], parent_old_number, parent_new_number))
+            children = page.get('children')
+            if children:
+                stack.extend(reversed(children))
                 
     return plan
@@ -1,11 +1,42 @@
-import json
 import os
 import re
 import sys
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+import time
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable
+from datetime import datetime
 import hashlib
-from utils import flatten_pages
+import heapq
+from utils import flatten_pages, count_pages, json_dumps, json_loads, json_load_file
+
+# 검색 텍스트 정규화에 쓰는 정규식 (모듈 로드 시 한 번만 컴파일)
+_RE_TAG = re.compile(r'<[^>]+>')
+_RE_PUNCT = re.compile(r'[^\w\s가-힣]')
+# 캐시 디렉터리의 책 데이터 파일 이름 (메타 파일 제외)
+_RE_BOOK_FILE = re.compile(r'book_(\d+)\.json')
+
+def _env_number(name: str, default, minimum):
+    """
+    환경 변수를 default와 같은 타입의 숫자로 읽음
+    
+    숫자가 아니면 경고를 남기고 default를, minimum보다 작으면 minimum을 사용합니다.
+    """
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    try:
+        value = type(default)(raw)
+    except ValueError:
+        print(f"Warning: Invalid {name}={raw!r}. Using default {default}.", file=sys.stderr)
+        return default
+    return max(value, minimum)
+
+# 메모리에 파싱된 상태로 보관할 최대 책 수 (환경 변수로 조정 가능)
+MEMORY_CACHE_SIZE = _env_number("WIKIDOCS_MEMORY_CACHE_SIZE", 32, 1)
+# 파일 mtime을 확인한 뒤 이 시간(초) 동안은 다시 확인하지 않고 메모리 데이터를 사용
+MEMORY_CACHE_TTL = _env_number("WIKIDOCS_MEMORY_CACHE_TTL", 5.0, 0.0)
 
 class BookCache:
     """책 데이터 캐시 관리 클래스"""
@@ -17,11 +48,23 @@ class BookCache:
             cache_dir = os.path.join(home_dir, ".wikidocs_mcp_cache")
         
         self.cache_dir = cache_dir
+        # 책별 (캐시 파일 mtime, 파싱된 책 데이터, mtime 확인 시각, 파생 인덱스) - 최근 사용 순 LRU
+        # 파생 인덱스(페이지 인덱스, 검색 인덱스 등)는 항목과 함께 보관되어
+        # LRU에서 밀려나거나 무효화되면 책 데이터와 함께 해제됨
+        self._memory: "OrderedDict[int, tuple]" = OrderedDict()
+        # mark_stale로 무효 처리되었지만 아직 파일이 삭제되지 않은 책
+        self._stale: set = set()
+        # 책별 무효화 세대 - mark_stale/invalidate_book마다 증가
+        # (무효화 전에 가져온 데이터가 뒤늦게 저장되지 않도록 save_book_data에서 비교)
+        self._generation: Dict[int, int] = {}
+        # save_book_data가 작업 스레드에서 실행될 수 있으므로 메모리 캐시 갱신을 보호
+        self._lock = threading.Lock()
+        # 같은 캐시 파일을 저장과 삭제가 동시에 건드리지 않도록 파일 작업을 직렬화
+        self._io_lock = threading.Lock()
         try:
             os.makedirs(cache_dir, exist_ok=True)
         except OSError as e:
             # 캐시 디렉터리 생성 실패 시 임시 디렉터리 사용
-            import tempfile
             self.cache_dir = tempfile.mkdtemp(prefix="wikidocs_mcp_")
             print(f"Warning: Could not create cache directory at {cache_dir}. Using temporary directory: {self.cache_dir}", file=sys.stderr)
     
@@ -34,71 +77,312 @@ class BookCache:
         return os.path.join(self.cache_dir, f"book_{book_id}_meta.json")
     
     def is_cache_valid(self, book_id: int, max_age_hours: int = 24) -> bool:
-        """캐시가 유효한지 확인"""
+        """
+        캐시가 유효한지 확인
+        
+        메타 파일은 저장할 때마다 새로 쓰므로 그 수정 시각이 곧 캐시 시각입니다.
+        메타 파일을 읽고 파싱하지 않고 stat 한 번으로 판단합니다.
+        """
+        if book_id in self._stale:
+            return False
         try:
-            meta_path = self._get_cache_meta_path(book_id)
-            if not os.path.exists(meta_path):
-                return False
-            
-            with open(meta_path, 'r', encoding='utf-8') as f:
-                meta = json.load(f)
-            
-            cache_time = datetime.fromisoformat(meta.get('cached_at', ''))
-            return datetime.now() - cache_time < timedelta(hours=max_age_hours)
-        except Exception as e:
+            mtime = os.stat(self._get_cache_meta_path(book_id)).st_mtime
+        except FileNotFoundError:
+            return False
+        except OSError as e:
             print(f"Warning: Failed to check cache validity for book {book_id}: {e}", file=sys.stderr)
             return False
+        return time.time() - mtime < max_age_hours * 3600
+    
+    def _remember(self, book_id: int, mtime: float, book_data: Dict[str, Any]) -> None:
+        """파싱된 책 데이터를 메모리 LRU에 보관"""
+        with self._lock:
+            self._memory[book_id] = (mtime, book_data, time.monotonic(), {})
+            self._memory.move_to_end(book_id)
+            while len(self._memory) > MEMORY_CACHE_SIZE:
+                self._memory.popitem(last=False)
+    
+    def get_derived(
+        self,
+        book_id: int,
+        key: str,
+        book_data: Dict[str, Any],
+        build: Callable[[Dict[str, Any]], Any]
+    ) -> Any:
+        """
+        책 데이터에서 만든 인덱스를 메모리 항목에 보관하고 재사용
+        
+        메모리 LRU가 같은 책 데이터를 갖고 있을 때만 보관하므로, 항목이
+        밀려나거나 무효화되면 인덱스도 함께 해제됩니다.
+        """
+        with self._lock:
+            entry = self._memory.get(book_id)
+            if entry is not None and entry[1] is book_data and key in entry[3]:
+                return entry[3][key]
+        
+        value = build(book_data)
+        with self._lock:
+            entry = self._memory.get(book_id)
+            if entry is not None and entry[1] is book_data:
+                entry[3][key] = value
+        return value
+    
+    def _forget(self, book_id: int) -> None:
+        """메모리 LRU에서 책 데이터 제거"""
+        with self._lock:
+            self._memory.pop(book_id, None)
+    
+    def generation(self, book_id: int) -> int:
+        """
+        책의 현재 무효화 세대 반환
+        
+        API에서 책을 가져오기 전에 받아 두었다가 save_book_data에 넘기면
+        그 사이 무효화된 경우 저장하지 않습니다.
+        """
+        with self._lock:
+            return self._generation.get(book_id, 0)
+    
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        """
+        같은 디렉터리의 임시 파일에 쓴 뒤 os.replace로 교체합니다.
+        
+        쓰는 도중 중단되어도 읽는 쪽에는 이전 파일이나 완성된 파일만 보입니다.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            # 쓰기 실패(디스크 부족 등) 시 임시 파일이 캐시 디렉터리에 쌓이지 않도록 정리
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    
+    def save_book_data(
+        self,
+        book_id: int,
+        book_data: Dict[str, Any],
+        generation: Optional[int] = None
+    ) -> None:
+        """
+        책 데이터를 캐시에 저장
+        
+        큰 책은 직렬화와 쓰기에 시간이 걸리므로 비동기 코드에서는
+        asyncio.to_thread로 호출하세요.
+        generation(가져오기 전에 받은 generation() 값)을 주면 그 뒤 책이
+        무효화된 경우 저장하지 않습니다.
+        """
+        with self._io_lock:
+            if generation is None:
+                generation = self.generation(book_id)
+            elif generation != self.generation(book_id):
+                return
+            self._save_book_data(book_id, book_data, generation)
     
-    def save_book_data(self, book_id: int, book_data: Dict[str, Any]) -> None:
-        """책 데이터를 캐시에 저장"""
+    def _save_book_data(self, book_id: int, book_data: Dict[str, Any], generation: int) -> None:
+        """save_book_data 본체 (_io_lock을 잡은 상태에서 호출)"""
+        self._forget(book_id)
         try:
             cache_path = self._get_cache_path(book_id)
             meta_path = self._get_cache_meta_path(book_id)
             
             # 데이터 저장
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(book_data, f, ensure_ascii=False, indent=2)
-
-            flat_pages = flatten_pages(book_data.get('pages', []))
+            # 들여쓰기 없이 저장하여 파일 크기와 읽기/파싱 비용을 줄임
+            # 키를 정렬해 두면 같은 바이트로 체크섬도 계산할 수 있어 한 번만 직렬화
+            payload = json_dumps(book_data, sort_keys=True)
+            self._write_atomic(cache_path, payload)
+            mtime = os.path.getmtime(cache_path)
             
             # 메타데이터 저장
             meta = {
                 'cached_at': datetime.now().isoformat(),
-                'total_pages': len(flat_pages),
+                'total_pages': count_pages(book_data.get('pages', [])),
                 'book_subject': book_data.get('subject', ''),
-                'checksum': hashlib.md5(json.dumps(book_data, sort_keys=True).encode()).hexdigest()
+                # 변경 감지용이라 보안 강도는 필요 없음 - SHA 명령어 가속을 받는 sha1이 md5보다 빠름
+                'checksum': hashlib.sha1(payload, usedforsecurity=False).hexdigest()
             }
             
-            with open(meta_path, 'w', encoding='utf-8') as f:
-                json.dump(meta, f, ensure_ascii=False, indent=2)
+            self._write_atomic(meta_path, json_dumps(meta, indent=True))
+            
+            # 쓰는 도중 무효화되었으면 유효 처리하지 않음 (파일은 대기 중인 invalidate_book이 삭제)
+            with self._lock:
+                if self._generation.get(book_id, 0) != generation:
+                    return
+                self._stale.discard(book_id)
+            self._remember(book_id, mtime, book_data)
                 
         except Exception as e:
             print(f"Warning: Failed to save cache for book {book_id}: {e}", file=sys.stderr)
     
     def load_book_data(self, book_id: int) -> Optional[Dict[str, Any]]:
-        """캐시에서 책 데이터 로드"""
+        """
+        캐시에서 책 데이터 로드
+        
+        캐시 파일이 바뀌지 않았으면(mtime 동일) 메모리에 보관된 데이터를
+        그대로 반환하여 파일 읽기와 JSON 파싱을 생략합니다.
+        최근 MEMORY_CACHE_TTL초 안에 확인한 책은 mtime 확인도 생략합니다.
+        반환된 데이터는 공유되므로 수정하지 마세요.
+        """
+        if book_id in self._stale:
+            return None
+        
+        now = time.monotonic()
+        with self._lock:
+            entry = self._memory.get(book_id)
+            if entry is not None and now - entry[2] < MEMORY_CACHE_TTL:
+                self._memory.move_to_end(book_id)
+                return entry[1]
+        
         try:
             cache_path = self._get_cache_path(book_id)
-            if not os.path.exists(cache_path):
+            # exists 확인 없이 바로 stat (파일이 없을 때만 예외)
+            try:
+                mtime = os.path.getmtime(cache_path)
+            except FileNotFoundError:
+                self._forget(book_id)
                 return None
             
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with self._lock:
+                entry = self._memory.get(book_id)
+                if entry is not None and entry[0] == mtime:
+                    self._memory[book_id] = (mtime, entry[1], now, entry[3])
+                    self._memory.move_to_end(book_id)
+                    return entry[1]
+            
+            book_data = json_load_file(cache_path)
+            self._remember(book_id, mtime, book_data)
+            return book_data
         except Exception as e:
             print(f"Warning: Failed to load cache for book {book_id}: {e}", file=sys.stderr)
             return None
     
+    def get_page(self, book_id: int, page_id: int) -> Optional[Dict[str, Any]]:
+        """
+        유효한 캐시에서 페이지를 찾아 반환합니다. (하위 페이지 트리 제외)
+        
+        page_id 인덱스는 책마다 한 번만 만들어 두고 재사용합니다.
+        캐시가 없거나 만료되었거나 페이지가 없으면 None을 반환합니다.
+        """
+        return self.get_pages(book_id, [page_id]).get(page_id)
+    
+    def get_pages(self, book_id: int, page_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        유효한 캐시에서 여러 페이지를 찾아 page_id -> 페이지로 반환합니다. (하위 페이지 트리 제외)
+        
+        캐시 유효성 확인과 책 데이터 로드는 한 번만 합니다.
+        캐시가 없거나 만료되었으면 빈 딕셔너리, 없는 페이지는 결과에서 빠집니다.
+        """
+        if not self.is_cache_valid(book_id):
+            return {}
+        
+        book_data = self.load_book_data(book_id)
+        if not book_data:
+            return {}
+        
+        # 책 데이터가 다시 로드되었으면 인덱스도 새로 생성
+        pages_by_id = self.get_derived(book_id, "pages_by_id", book_data, self._build_page_index)
+        pages = {}
+        for page_id in page_ids:
+            page = pages_by_id.get(page_id)
+            if page is not None and page_id not in pages:
+                pages[page_id] = {k: v for k, v in page.items() if k != 'children'}
+        return pages
+    
+    @staticmethod
+    def _build_page_index(book_data: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+        """page_id -> 페이지 인덱스 생성"""
+        return {
+            page.get('id'): page
+            for page in flatten_pages(book_data.get('pages', []))
+        }
+    
+    def find_page(self, page_id: int) -> Optional[tuple]:
+        """
+        메모리에 페이지 인덱스가 이미 만들어진 책들에서 페이지를 찾습니다.
+        
+        파일을 읽거나 인덱스를 새로 만들지 않습니다. 캐시된 값은 오래되었을 수
+        있으므로 페이지가 속한 책을 알아내는 용도로만 쓰세요.
+        
+        Returns:
+            (book_id, page) 튜플. 찾지 못하면 None
+        """
+        with self._lock:
+            indexes = [(book_id, entry[3].get("pages_by_id")) for book_id, entry in self._memory.items()]
+        for book_id, pages_by_id in indexes:
+            page = pages_by_id.get(page_id) if pages_by_id else None
+            if page is not None:
+                return book_id, {k: v for k, v in page.items() if k != 'children'}
+        return None
+    
+    def books_with_page(self, page_id: int) -> List[int]:
+        """
+        페이지가 들어 있는 캐시된 책 ID 목록 (메모리와 디스크의 모든 책 파일 검사)
+        
+        페이지가 속한 책을 모를 때 관련 캐시를 모두 무효화하는 용도입니다.
+        파일은 파싱하지 않고 바이트에서 페이지 id를 찾으므로 관계없는 책이
+        섞일 수는 있어도 빠뜨리지는 않습니다. 큰 캐시 디렉터리를 훑으므로
+        비동기 코드에서는 asyncio.to_thread로 호출하세요.
+        """
+        with self._lock:
+            entries = [(book_id, entry[1]) for book_id, entry in self._memory.items()]
+        book_ids = {
+            book_id for book_id, book_data in entries
+            if page_id in self.get_derived(book_id, "pages_by_id", book_data, self._build_page_index)
+        }
+        
+        needle = re.compile(rb'"id":\s*%d\s*[,}]' % page_id)
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError as e:
+            print(f"Warning: Failed to list cache directory {self.cache_dir}: {e}", file=sys.stderr)
+            names = []
+        for name in names:
+            match = _RE_BOOK_FILE.fullmatch(name)
+            if match is None or int(match.group(1)) in book_ids:
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, name), 'rb') as f:
+                    if needle.search(f.read()):
+                        book_ids.add(int(match.group(1)))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Warning: Failed to read cache file {name}: {e}", file=sys.stderr)
+        return sorted(book_ids)
+    
+    def mark_stale(self, book_id: int) -> None:
+        """
+        파일을 지우지 않고 책 캐시를 즉시 무효 처리합니다.
+        
+        이후 조회는 캐시가 없는 것처럼 동작하며, 실제 파일 삭제는
+        invalidate_book에서 합니다. (새로 저장하면 다시 유효해짐)
+        """
+        with self._lock:
+            self._stale.add(book_id)
+            self._generation[book_id] = self._generation.get(book_id, 0) + 1
+            self._memory.pop(book_id, None)
+    
     def invalidate_book(self, book_id: int) -> None:
         """해당 책 캐시 파일과 메타파일을 모두 삭제"""
-        for path in (
-            self._get_cache_path(book_id),
-            self._get_cache_meta_path(book_id)
-        ):
-            try:
-                if os.path.exists(path):
+        with self._io_lock:
+            with self._lock:
+                self._generation[book_id] = self._generation.get(book_id, 0) + 1
+                self._memory.pop(book_id, None)
+            for path in (
+                self._get_cache_path(book_id),
+                self._get_cache_meta_path(book_id)
+            ):
+                try:
                     os.remove(path)
-            except OSError as e:
-                print(f"[Cache] remove failed {path}: {e}", file=sys.stderr)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"[Cache] remove failed {path}: {e}", file=sys.stderr)
+            with self._lock:
+                self._stale.discard(book_id)
 
 
 class PageSearcher:
@@ -113,16 +397,79 @@ class PageSearcher:
             return ""
         
         # HTML 태그 제거
-        text = re.sub(r'<[^>]+>', '', text)
+        text = _RE_TAG.sub('', text)
         # 특수문자 제거 (일부만)
-        text = re.sub(r'[^\w\s가-힣]', ' ', text)
-        # 공백 정리
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = _RE_PUNCT.sub(' ', text)
+        # 공백 정리 (split/join이 정규식 치환보다 빠르고 결과는 같음)
+        text = ' '.join(text.split())
         return text.lower()
 
-    def search_pages(self, book_id: int, query: str, max_results: int = 20) -> List[Dict[str, Any]]:
-        """페이지에서 키워드 검색"""
-        book_data = self.cache.load_book_data(book_id)
+    @staticmethod
+    def _bigrams(text: str) -> set:
+        """문자 2-gram 집합"""
+        return {text[i:i + 2] for i in range(len(text) - 1)}
+
+    def _build_index(self, book_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        검색 인덱스 생성
+        
+        정규화한 제목/내용의 문자 2-gram -> 페이지 위치 집합(역색인)을 만듭니다.
+        단어 단위가 아닌 2-gram을 쓰므로 '설치'로 '설치하기'를 찾는 것 같은
+        부분 문자열 검색 결과가 선형 검색과 동일하게 유지됩니다.
+        """
+        pages = flatten_pages(book_data.get("pages", []))
+        # 페이지 위치별 정규화한 (제목, 내용) - 검색할 때마다 다시 정규화하지 않도록 보관
+        texts: List[tuple] = []
+        postings: Dict[str, set] = {}
+        
+        for position, page in enumerate(pages):
+            subject = self._normalize_text(page.get('subject', ''))
+            content = self._normalize_text(page.get('content', ''))
+            texts.append((subject, content))
+            # 제목과 내용 사이에는 검색어에 나올 수 없는 줄바꿈을 넣어 경계를 넘는 2-gram 방지
+            for gram in self._bigrams(subject + "\n" + content):
+                postings.setdefault(gram, set()).add(position)
+        
+        return {"pages": pages, "texts": texts, "postings": postings}
+
+    def _get_index(self, book_id: int, book_data: Dict[str, Any]) -> Dict[str, Any]:
+        """책 데이터에 대한 검색 인덱스 반환 (메모리 캐시에 같은 데이터가 있으면 재사용)"""
+        return self.cache.get_derived(book_id, "search_index", book_data, self._build_index)
+
+    def _find_candidates(self, index: Dict[str, Any], query: str) -> Optional[List[int]]:
+        """
+        점수가 0보다 클 수 있는 페이지 위치 목록 반환
+        
+        전체 검색어나 두 글자 이상 단어 중 하나라도 포함한 페이지만 후보가 됩니다.
+        한 글자 검색어처럼 2-gram으로 거를 수 없으면 None(전체 검색)을 반환합니다.
+        """
+        if len(query) < 2:
+            return None
+        
+        postings = index["postings"]
+        candidates: set = set()
+        for needle in [query] + [w for w in query.split() if len(w) > 1]:
+            matched = None
+            for gram in self._bigrams(needle):
+                positions = postings.get(gram)
+                if not positions:
+                    matched = set()
+                    break
+                matched = set(positions) if matched is None else matched & positions
+            candidates |= matched
+        
+        return sorted(candidates)
+
+    def search_pages(
+        self,
+        book_id: int,
+        query: str,
+        max_results: int = 20,
+        book_data: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """페이지에서 키워드 검색 (book_data를 주면 캐시를 다시 읽지 않음)"""
+        if book_data is None:
+            book_data = self.cache.load_book_data(book_id)
         if not book_data:
             return []
 
@@ -130,33 +477,55 @@ class PageSearcher:
         if not query_normalized:
             return []
         
-        results = []
-        pages = flatten_pages(book_data.get("pages", []))
+        index = self._get_index(book_id, book_data)
+        pages = index["pages"]
+        texts = index["texts"]
+        positions = self._find_candidates(index, query_normalized)
+        if positions is None:
+            positions = range(len(pages))
         
-        for page in pages:
-            score = self._calculate_relevance_score(page, query_normalized)
-            if score > 0:
-                result = {
-                    'id': page.get('id'),
-                    'subject': page.get('subject', ''),
-                    'content_preview': self._get_content_preview(page.get('content', ''), query),
-                    'depth': page.get('depth', 0),
-                    'parent_id': page.get('parent_id'),
-                    'seq': page.get('seq', 0),
-                    'relevance_score': score,
-                    'match_type': self._get_match_type(page, query_normalized)
-                }
-                results.append(result)
-        
-        # 관련도 순으로 정렬
-        results.sort(key=lambda x: x['relevance_score'], reverse=True)
-        return results[:max_results]
-    
-    def _calculate_relevance_score(self, page: Dict[str, Any], query: str) -> float:
-        """관련도 점수 계산"""
-        subject = self._normalize_text(page.get('subject', ''))
-        content = self._normalize_text(page.get('content', ''))
+        # 검색어 단어는 페이지마다 나누지 않고 한 번만 준비
+        terms = self._query_terms(query_normalized)
+        
+        # 점수만 먼저 계산 (제너레이터로 넘겨 전체 매칭 목록을 만들지 않음)
+        scores = (
+            (self._calculate_relevance_score(*texts[position], query_normalized, terms), position)
+            for position in positions
+        )
+        scored = (item for item in scores if item[0] > 0)
         
+        # 관련도 상위 max_results개만 선택 (크기 max_results의 힙 사용, 동점은 책 순서 유지)
+        top = heapq.nlargest(max_results, scored, key=lambda item: item[0])
+        
+        # 미리보기·매칭 타입은 선택된 페이지에 대해서만 생성
+        preview_patterns = self._preview_patterns(query, query_normalized)
+        results = []
+        for score, position in top:
+            page = pages[position]
+            subject, content = texts[position]
+            results.append({
+                'id': page.get('id'),
+                'subject': page.get('subject', ''),
+                'content_preview': self._get_content_preview(page.get('content', ''), preview_patterns),
+                'depth': page.get('depth', 0),
+                'parent_id': page.get('parent_id'),
+                'seq': page.get('seq', 0),
+                'relevance_score': score,
+                'match_type': self._get_match_type(subject, content, query_normalized)
+            })
+        return results
+    
+    @staticmethod
+    def _query_terms(query: str) -> List[tuple]:
+        """부분 매칭에 쓸 검색어 단어별 (단어, 등장 횟수) 목록 (한글자 키워드 제외)"""
+        terms: Dict[str, int] = {}
+        for word in query.split():
+            if len(word) > 1:
+                terms[word] = terms.get(word, 0) + 1
+        return list(terms.items())
+    
+    def _calculate_relevance_score(self, subject: str, content: str, query: str, terms: List[tuple]) -> float:
+        """관련도 점수 계산 (정규화된 제목/내용/검색어, terms는 _query_terms 결과)"""
         score = 0.0
         
         # 제목에서 매칭 (가중치 높음)
@@ -172,20 +541,17 @@ class PageSearcher:
             score += content_matches * 2.0
         
         # 키워드 부분 매칭
-        query_words = query.split()
-        for word in query_words:
-            if len(word) > 1:  # 한글자 키워드 제외
-                if word in subject:
-                    score += 3.0
-                score += content.count(word) * 0.5
+        # 같은 단어는 한 번만 세고, 한 단어 검색어는 위에서 센 횟수를 재사용 (내용을 다시 훑지 않음)
+        for word, times in terms:
+            if word in subject:
+                score += 3.0 * times
+            matches = content_matches if word == query else content.count(word)
+            score += matches * 0.5 * times
         
         return score
     
-    def _get_match_type(self, page: Dict[str, Any], query: str) -> str:
-        """매칭 타입 결정"""
-        subject = self._normalize_text(page.get('subject', ''))
-        content = self._normalize_text(page.get('content', ''))
-        
+    def _get_match_type(self, subject: str, content: str, query: str) -> str:
+        """매칭 타입 결정 (정규화된 제목/내용/검색어)"""
         if query in subject:
             return "title_match"
         elif query in content:
@@ -193,22 +559,43 @@ class PageSearcher:
         else:
             return "partial_match"
     
-    def _get_content_preview(self, content: str, query: str, context_length: int = 100) -> str:
-        """검색어 주변 내용 미리보기 생성"""
-        if not content or not query:
-            return content[:context_length] + "..." if len(content) > context_length else content
-        
-        content_clean = self._normalize_text(content)
-        query_clean = self._normalize_text(query)
+    @staticmethod
+    def _preview_patterns(query: str, query_normalized: str) -> List["re.Pattern"]:
+        """
+        미리보기 위치를 찾을 패턴 목록 (앞의 패턴부터 시도)
         
-        # 검색어 위치 찾기
-        index = content_clean.find(query_clean)
-        if index == -1:
+        원문에서 직접 찾으므로 대소문자만 무시하고, 전체 검색어가 없으면
+        정규화한 검색어, 그다음 단어 중 하나를 찾습니다.
+        """
+        patterns = [
+            re.compile(re.escape(needle), re.IGNORECASE)
+            for needle in dict.fromkeys((query.strip(), query_normalized)) if needle
+        ]
+        words = sorted({w for w in query_normalized.split() if len(w) > 1}, key=len, reverse=True)
+        if words:
+            patterns.append(re.compile('|'.join(map(re.escape, words)), re.IGNORECASE))
+        return patterns
+    
+    def _get_content_preview(
+        self,
+        content: str,
+        patterns: List["re.Pattern"],
+        context_length: int = 100
+    ) -> str:
+        """검색어 주변 내용 미리보기 생성 (patterns는 _preview_patterns 결과)"""
+        # 검색어 위치 찾기 (정규화한 텍스트의 위치는 원문과 어긋나므로 원문에서 찾음)
+        match = None
+        if content:
+            for pattern in patterns:
+                match = pattern.search(content)
+                if match:
+                    break
+        if match is None:
             return content[:context_length] + "..." if len(content) > context_length else content
         
         # 앞뒤 context_length//2 만큼 추출
-        start = max(0, index - context_length // 2)
-        end = min(len(content), index + len(query) + context_length // 2)
+        start = max(0, match.start() - context_length // 2)
+        end = min(len(content), match.end() + context_length // 2)
         
         preview = content[start:end]
         
@@ -220,16 +607,25 @@ class PageSearcher:
         
         return preview
     
-    def get_book_structure(self, book_id: int, max_depth: int = 2) -> List[Dict[str, Any]]:
-        """책 구조 요약 (목차 형태)"""
-        book_data = self.cache.load_book_data(book_id)
+    def get_book_structure(
+        self,
+        book_id: int,
+        max_depth: int = 2,
+        book_data: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """책 구조 요약 (목차 형태, book_data를 주면 캐시를 다시 읽지 않음)"""
+        if book_data is None:
+            book_data = self.cache.load_book_data(book_id)
         if not book_data:
             return []
         
-        pages = flatten_pages(book_data.get("pages", []))
         structure = []
+        # flatten_pages와 같은 순서로 순회하되, max_depth에 이른 페이지의
+        # 하위 트리는 내려가지 않음 (하위 페이지의 depth는 더 크므로)
+        stack = book_data.get("pages", [])[::-1]
         
-        for page in pages:
+        while stack:
+            page = stack.pop()
             depth = page.get('depth', 0)
             if depth <= max_depth:
                 structure.append({
@@ -240,19 +636,24 @@ class PageSearcher:
                     'seq': page.get('seq', 0),
                     'has_content': bool(page.get('content', '').strip())
                 })
+            # depth 정보가 없는 페이지는 하위 깊이를 알 수 없으므로 계속 탐색
+            if depth < max_depth or 'depth' not in page:
+                stack.extend(reversed(page.get('children', [])))
         
         return structure
     
     def get_cache_info(self, book_id: int) -> Dict[str, Any]:
         """캐시 정보 반환"""
+        if book_id in self.cache._stale:
+            return {"cached": False}
         try:
-            meta_path = self.cache._get_cache_meta_path(book_id)
-            if not os.path.exists(meta_path):
+            # exists 확인 없이 바로 열고, 텍스트로 디코딩하지 않고 바이트를 바로 파싱
+            try:
+                with open(self.cache._get_cache_meta_path(book_id), 'rb') as f:
+                    meta = json_loads(f.read())
+            except FileNotFoundError:
                 return {"cached": False}
             
-            with open(meta_path, 'r', encoding='utf-8') as f:
-                meta = json.load(f)
-            
             return {
                 "cached": True,
                 "cached_at": meta.get('cached_at'),
@@ -0,0 +1,42 @@
+import asyncio
+import unittest
+from api_loader import SingleFlight
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_calls_share_one_request(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def request(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return {"key": key}
+
+        results = await asyncio.gather(
+            *(flight.fetch("a", lambda: request("a")) for _ in range(5)),
+            flight.fetch("b", lambda: request("b")),
+        )
+        self.assertEqual(calls, ["a", "b"])
+        self.assertEqual([r["key"] for r in results], ["a"] * 5 + ["b"])
+        self.assertEqual(len(flight), 0)
+
+        # 끝난 요청은 공유하지 않고 다시 실행
+        await flight.fetch("a", lambda: request("a"))
+        self.assertEqual(calls, ["a", "b", "a"])
+
+    async def test_waiters_get_cancelled_result(self):
+        flight = SingleFlight(cancelled_result="cancelled")
+
+        async def request():
+            await asyncio.sleep(1)
+
+        owner = asyncio.create_task(flight.fetch("a", request))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.fetch("a", request))
+        await asyncio.sleep(0)
+        owner.cancel()
+        self.assertEqual(await waiter, "cancelled")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,263 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from unittest import mock
+import httpx
+import book_tools
+import search_utils
+import utils
+from http_client import set_client
+from search_utils import BookCache
+
+class FakeServer:
+    """도구 함수만 모으는 MCP 서버 대역"""
+
+    def __init__(self):
+        self.tools = {}
+
+    def tool(self, name=None, description=None, **kwargs):
+        def decorator(fn):
+            self.tools[name] = fn
+            return fn
+        return decorator
+
+class BookToolsTestCase(unittest.IsolatedAsyncioTestCase):
+    """가짜 위키독스 API(페이지 저장소)를 붙인 도구 테스트 기반 클래스"""
+
+    BOOK_ID = 7
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = BookCache(cache_dir=self.tmp.name)
+        for patcher in (
+            mock.patch.object(utils, "API_TOKEN", "test-token"),
+            mock.patch.object(search_utils, "_book_cache", self.cache),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.pages = {
+            1: self.make_page(1, "1. 소개", "## 1. 소개\n본문"),
+            2: self.make_page(2, "2. 설치", "## 2. 설치\n본문"),
+        }
+        self.requests = []
+        # 동시에 처리 중인 요청 수 (동시 전송 여부 확인용)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        set_client(httpx.AsyncClient(transport=httpx.MockTransport(self.handle)))
+        self.addCleanup(set_client, None)
+
+        book_tools._recent_pages.clear()
+        utils.clear_response_cache()
+        self.addCleanup(book_tools._recent_pages.clear)
+        self.addCleanup(utils.clear_response_cache)
+
+        server = FakeServer()
+        book_tools.register_book_tools(server)
+        self.tools = server.tools
+
+    async def asyncTearDown(self):
+        # 캐시 저장·삭제 백그라운드 작업이 임시 디렉터리 정리 전에 끝나도록 대기
+        await asyncio.gather(*book_tools._background_tasks)
+
+    def make_page(self, page_id, subject, content):
+        return {
+            "id": page_id, "subject": subject, "content": content,
+            "parent_id": 0, "open_yn": "Y", "book_id": self.BOOK_ID,
+            "depth": 0, "seq": page_id,
+        }
+
+    def book(self):
+        return {
+            "id": self.BOOK_ID, "subject": "테스트 책", "summary": "",
+            "pages": [{**page, "children": []} for page in self.pages.values()],
+        }
+
+    async def handle(self, request):
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # 다른 요청이 끼어들 수 있도록 한 번 양보
+            await asyncio.sleep(0)
+            return self.respond(request)
+        finally:
+            self.in_flight -= 1
+
+    def respond(self, request):
+        _, kind, key = request.url.path.strip("/").split("/")
+        if kind == "books":
+            return httpx.Response(200, json=self.book())
+        page = self.pages.get(int(key))
+        if page is None:
+            return httpx.Response(404)
+        if request.method == "PUT":
+            body = json.loads(request.content)
+            # 서버는 book_id 0을 "변경 없음"으로 처리
+            page.update({k: v for k, v in body.items() if k != "book_id" or v})
+        return httpx.Response(200, json=page)
+
+    def sent(self, method):
+        return [request for request in self.requests if request.method == method]
+
+    def put_bodies(self):
+        return [json.loads(request.content) for request in self.sent("PUT")]
+
+class TestUpdatePage(BookToolsTestCase):
+
+    async def test_partial_update_merges_server_values(self):
+        # 책 캐시에 이전 내용이 남아 있어도 병합 기준은 서버의 현재 값
+        self.cache.save_book_data(self.BOOK_ID, self.book())
+        self.pages[1]["content"] = "서버에서 바뀐 내용"
+        result = await self.tools["update_page"](1, subject="1. 들어가며")
+        self.assertEqual(result["updated_fields"], ["subject"])
+        self.assertEqual(len(self.sent("GET")), 1)
+        body = self.put_bodies()[0]
+        self.assertEqual(body["subject"], "1. 들어가며")
+        self.assertEqual(body["content"], "서버에서 바뀐 내용")
+        self.assertEqual(body["book_id"], self.BOOK_ID)
+        # 수정한 책 캐시는 무효화
+        self.assertIsNone(self.cache.load_book_data(self.BOOK_ID))
+
+    async def test_full_update_skips_get(self):
+        result = await self.tools["update_page"](
+            1, subject="새 제목", content="새 내용", parent_id=0, open_yn="N"
+        )
+        self.assertNotIn("error", result)
+        self.assertEqual(self.sent("GET"), [])
+        self.assertEqual(len(self.sent("PUT")), 1)
+        self.assertEqual(self.pages[1]["open_yn"], "N")
+
+    async def test_check_changes(self):
+        page = self.pages[1]
+        result = await self.tools["update_page"](
+            1, page["subject"], page["content"], page["parent_id"], page["open_yn"],
+            check_changes=True
+        )
+        self.assertEqual(result["error"], "NO_CHANGES")
+        self.assertEqual(len(self.sent("GET")), 1)
+        self.assertEqual(self.sent("PUT"), [])
+
+    async def test_recent_page_skips_get(self):
+        await self.tools["update_page"](1, subject="첫 수정")
+        await self.tools["update_page"](1, content="두 번째 수정")
+        # 두 번째 수정은 방금 저장한 값을 병합 기준으로 사용
+        self.assertEqual(len(self.sent("GET")), 1)
+        self.assertEqual(self.pages[1]["subject"], "첫 수정")
+        self.assertEqual(self.pages[1]["content"], "두 번째 수정")
+
+    async def test_full_update_resolves_book_from_cache(self):
+        self.cache.save_book_data(self.BOOK_ID, self.book())
+        self.cache.get_page(self.BOOK_ID, 1)
+        await self.tools["update_page"](1, "새 제목", "새 내용", 0, "Y")
+        self.assertEqual(self.put_bodies()[0]["book_id"], self.BOOK_ID)
+        self.assertIsNone(self.cache.load_book_data(self.BOOK_ID))
+
+    async def test_full_update_unknown_book_invalidates_every_cached_book(self):
+        # 인덱스가 없고 PUT 응답에도 book_id가 없으면 페이지가 들어 있는 책 캐시를 모두 무효화
+        self.cache.save_book_data(self.BOOK_ID, self.book())
+        self.cache.save_book_data(8, {"subject": "다른 책", "pages": []})
+        self.cache._forget(self.BOOK_ID)
+        del self.pages[1]["book_id"]
+        result = await self.tools["update_page"](1, "새 제목", "새 내용", 0, "Y")
+        self.assertNotIn("book_id", result)
+        self.assertEqual(self.put_bodies()[0]["book_id"], 0)
+        self.assertIsNone(self.cache.load_book_data(self.BOOK_ID))
+        self.assertIsNotNone(self.cache.load_book_data(8))
+
+    async def test_old_cached_response_is_not_a_merge_base(self):
+        await self.tools["get_page"](1)
+        # 응답 캐시에 남은 조회 결과가 RECENT_PAGE_TTL보다 오래되었으면 다시 조회
+        fetched_at, page = utils._response_cache[book_tools.PAGE_URL(1)]
+        utils._response_cache[book_tools.PAGE_URL(1)] = (fetched_at - book_tools.RECENT_PAGE_TTL, page)
+        book_tools._recent_pages.clear()
+        await self.tools["get_page"](1)
+        self.assertEqual(len(self.sent("GET")), 1)
+        self.pages[1]["content"] = "서버에서 바뀐 내용"
+        await self.tools["update_page"](1, subject="1. 들어가며")
+        self.assertEqual(len(self.sent("GET")), 2)
+        self.assertEqual(self.put_bodies()[0]["content"], "서버에서 바뀐 내용")
+
+class TestBatchUpdatePages(BookToolsTestCase):
+
+    async def test_updates_pages(self):
+        result = await self.tools["batch_update_pages"]([
+            {"page_id": 1, "subject": "1. 들어가며"},
+            {"page_id": 2, "open_yn": "N"},
+            {"subject": "page_id 없음"},
+        ])
+        self.assertEqual(result["updated_count"], 2)
+        self.assertEqual(result["error_count"], 1)
+        self.assertEqual([r.get("page_id") for r in result["results"]], [1, 2, None])
+        self.assertEqual(self.pages[1]["subject"], "1. 들어가며")
+        self.assertEqual(self.pages[2]["open_yn"], "N")
+        self.assertGreater(self.max_in_flight, 1)
+
+    async def test_same_page_applied_in_order(self):
+        result = await self.tools["batch_update_pages"]([
+            {"page_id": 1, "subject": "새 제목"},
+            {"page_id": 2, "content": "다른 페이지"},
+            {"page_id": 1, "content": "새 내용"},
+        ])
+        self.assertEqual(result["updated_count"], 3)
+        # 같은 페이지의 두 번째 수정이 첫 번째 수정을 덮어쓰지 않음
+        self.assertEqual(self.pages[1]["subject"], "새 제목")
+        self.assertEqual(self.pages[1]["content"], "새 내용")
+        self.assertEqual([r["page_id"] for r in result["results"]], [1, 2, 1])
+
+class TestRenumberPages(BookToolsTestCase):
+
+    async def test_renumber_pages(self):
+        changes = [
+            {"page_id": 2, "new_number": "3"},
+            {"page_id": 1, "new_number": "2"},
+        ]
+        dry = await self.tools["renumber_pages"](self.BOOK_ID, changes)
+        self.assertEqual([r["page_id"] for r in dry["results"]], [2, 1])
+        self.assertIn("+Subject: 3. 설치", dry["results"][0]["diff"])
+        self.assertEqual(self.sent("PUT"), [])
+
+        result = await self.tools["renumber_pages"](self.BOOK_ID, changes, dry_run=False)
+        self.assertEqual([r["status"] for r in result["results"]], ["updated", "updated"])
+        self.assertEqual(self.pages[1]["subject"], "2. 소개")
+        self.assertEqual(self.pages[1]["content"], "## 2. 소개\n본문")
+        self.assertEqual(self.pages[2]["subject"], "3. 설치")
+        # 페이지별 조회·수정은 동시에 전송
+        self.assertGreater(self.max_in_flight, 1)
+
+    async def test_same_page_renumbered_in_order(self):
+        # 같은 페이지의 두 번째 변경은 첫 번째 변경이 저장된 본문에 적용
+        result = await self.tools["renumber_pages"](self.BOOK_ID, [
+            {"page_id": 1, "new_number": "2"},
+            {"page_id": 1, "old_number": "2", "new_number": "3"},
+        ], dry_run=False)
+        self.assertEqual([r["status"] for r in result["results"]], ["updated", "updated"])
+        self.assertEqual(self.pages[1]["subject"], "3. 소개")
+        self.assertEqual(self.pages[1]["content"], "## 3. 소개\n본문")
+        self.assertEqual([body["subject"] for body in self.put_bodies()], ["2. 소개", "3. 소개"])
+
+class TestCachedReads(BookToolsTestCase):
+
+    async def test_get_page_from_book_cache(self):
+        await self.tools["get_book_info"](self.BOOK_ID)
+        await asyncio.gather(*book_tools._background_tasks)
+        self.requests.clear()
+        page = await self.tools["get_page"](1, book_id=self.BOOK_ID)
+        self.assertEqual(page["subject"], "1. 소개")
+        self.assertEqual(self.requests, [])
+
+        result = await self.tools["batch_get_pages"]([1, 2, 1], book_id=self.BOOK_ID)
+        self.assertEqual([p["id"] for p in result["pages"]], [1, 2, 1])
+        self.assertEqual(result["cached_count"], 3)
+        self.assertEqual(self.requests, [])
+
+    async def test_batch_get_pages_fetches_duplicates_once(self):
+        result = await self.tools["batch_get_pages"]([1, 2, 1, 404])
+        self.assertEqual([p["id"] for p in result["pages"]], [1, 2, 1])
+        self.assertEqual([e["page_id"] for e in result["errors"]], [404])
+        self.assertEqual(len(self.sent("GET")), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,9 +3,29 @@ from renumber_utils import (
     get_page_number, 
     calculate_new_number, 
     replace_prefix, 
-    apply_renumbering
+    apply_renumbering,
+    find_target_pages,
+    create_renumbering_plan
 )
 
+BOOK = {"pages": [
+    {"id": 1, "subject": "1. 소개", "children": []},
+    {"id": 5, "subject": "5. 설치", "children": [
+        {"id": 51, "subject": "5.1 준비"},
+        {"id": 52, "subject": "5.2 설치하기", "children": [
+            {"id": 521, "subject": "5.2.1 윈도우", "children": [{"id": 5211, "subject": "5.2.1.1 상세"}]},
+            {"id": 522, "subject": "5.2.2 맥"},
+        ]},
+        {"id": 53, "subject": "5.3 확인", "children": [{"id": 531, "subject": "5.3.1 테스트"}, {"id": 532, "subject": "메모"}]},
+        {"id": 54, "subject": "부록"},
+        {"id": 55, "subject": "5.5 정리"},
+    ]},
+    {"id": 6, "subject": "6. 결론"},
+]}
+
+def plan_rows(plan):
+    return [(row["page_id"], row["old_number"], row["new_number"]) for row in plan]
+
 class TestRenumberUtils(unittest.TestCase):
     
     def test_get_page_number(self):
@@ -24,7 +44,28 @@ class TestRenumberUtils(unittest.TestCase):
         self.assertEqual(replace_prefix("5.2.1.1", "5.2", "5.3"), "5.3.1.1")
         self.assertEqual(replace_prefix("6.1.1", "5.2", "5.3"), "6.1.1") # No match
 
-    # test_create_renumbering_plan removed as the function was deleted.
+    def test_find_target_pages(self):
+        # 시작 페이지와 이후 형제들, 그 자손들 (목차 순서)
+        self.assertEqual(
+            [p["id"] for p in find_target_pages(BOOK, 52)],
+            [52, 521, 5211, 522, 53, 531, 532, 54, 55]
+        )
+        self.assertEqual(find_target_pages(BOOK, 999), [])
+
+    def test_create_renumbering_plan(self):
+        # 앞 형제(5.1) 다음 번호에서 offset만큼 밀기, 자손은 접두사 교체
+        self.assertEqual(plan_rows(create_renumbering_plan(BOOK, 52, 1)), [
+            (52, "5.2", "5.3"), (521, "5.2.1", "5.3.1"), (5211, "5.2.1.1", "5.3.1.1"),
+            (522, "5.2.2", "5.3.2"), (53, "5.3", "5.4"), (531, "5.3.1", "5.4.1"),
+        ])
+        # 첫 번째 자식은 자신의 번호를 기준으로 밀기
+        self.assertEqual(plan_rows(create_renumbering_plan(BOOK, 521, 1)), [
+            (521, "5.2.1", "5.2.2"), (5211, "5.2.1.1", "5.2.2.1"), (522, "5.2.2", "5.2.3"),
+        ])
+        # offset=0은 번호 없는 페이지를 건너뛰며 순서대로 정리
+        self.assertEqual(plan_rows(create_renumbering_plan(BOOK, 51, 0)), [(55, "5.5", "5.4")])
+        self.assertEqual(create_renumbering_plan(BOOK, 999, 1), [])
+
 
     def test_apply_renumbering(self):
         # 1. Subject only
@@ -0,0 +1,193 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from search_utils import BookCache, PageSearcher, _env_number
+
+BOOK = {
+    "subject": "테스트 책",
+    "pages": [
+        {"id": 1, "subject": "1. 소개", "content": "MCP 서버 소개", "depth": 0, "children": [
+            {"id": 2, "subject": "1.1 설치하기", "content": "pip로 설치합니다.", "depth": 1, "children": []},
+        ]},
+        {"id": 3, "subject": "2. 활용", "content": "<b>MCP</b> 활용 예제", "depth": 0, "children": []},
+    ],
+}
+
+class TestEnvNumber(unittest.TestCase):
+
+    def test_env_number(self):
+        with mock.patch.dict(os.environ, {"WIKIDOCS_TEST_SIZE": "8"}):
+            self.assertEqual(_env_number("WIKIDOCS_TEST_SIZE", 32, 1), 8)
+        with mock.patch.dict(os.environ, {"WIKIDOCS_TEST_SIZE": "0"}):
+            self.assertEqual(_env_number("WIKIDOCS_TEST_SIZE", 32, 1), 1)
+        # 숫자가 아니면 경고 후 기본값
+        with mock.patch.dict(os.environ, {"WIKIDOCS_TEST_SIZE": "many"}), \
+                mock.patch("sys.stderr"):
+            self.assertEqual(_env_number("WIKIDOCS_TEST_SIZE", 32, 1), 32)
+        self.assertEqual(_env_number("WIKIDOCS_TEST_UNSET", 5.0, 0.0), 5.0)
+
+class TestBookCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = BookCache(cache_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_reuses_parsed_data(self):
+        self.cache.save_book_data(10, BOOK)
+        first = self.cache.load_book_data(10)
+        self.assertEqual(first, BOOK)
+        # 파일이 바뀌지 않았으면 다시 파싱하지 않고 같은 객체를 반환
+        self.assertIs(self.cache.load_book_data(10), first)
+
+    def test_invalidate_book(self):
+        self.cache.save_book_data(10, BOOK)
+        self.cache.invalidate_book(10)
+        self.assertIsNone(self.cache.load_book_data(10))
+        self.assertIsNone(self.cache.get_page(10, 1))
+
+    def test_cache_validity_expires(self):
+        self.assertFalse(self.cache.is_cache_valid(10))
+        self.cache.save_book_data(10, BOOK)
+        self.assertTrue(self.cache.is_cache_valid(10))
+        # 메타 파일이 max_age_hours보다 오래되면 만료
+        old = time.time() - 25 * 3600
+        os.utime(self.cache._get_cache_meta_path(10), (old, old))
+        self.assertFalse(self.cache.is_cache_valid(10))
+        self.assertTrue(self.cache.is_cache_valid(10, max_age_hours=48))
+
+    def test_failed_write_leaves_no_temp_file(self):
+        with mock.patch("search_utils.os.replace", side_effect=OSError("disk full")):
+            self.cache.save_book_data(10, BOOK)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_mark_stale(self):
+        self.cache.save_book_data(10, BOOK)
+        self.cache.mark_stale(10)
+        # 파일은 남아 있어도 캐시가 없는 것처럼 동작
+        self.assertIsNone(self.cache.load_book_data(10))
+        self.assertIsNone(self.cache.get_page(10, 1))
+        self.assertFalse(PageSearcher(self.cache).get_cache_info(10)["cached"])
+        # 다시 저장하면 유효
+        self.cache.save_book_data(10, BOOK)
+        self.assertEqual(self.cache.load_book_data(10), BOOK)
+
+    def test_save_skipped_after_invalidation(self):
+        self.cache.save_book_data(10, BOOK)
+        generation = self.cache.generation(10)
+        # 가져오는 동안 책이 수정되어 무효화된 경우
+        self.cache.mark_stale(10)
+        self.cache.save_book_data(10, {"subject": "이전 데이터", "pages": []}, generation)
+        self.assertIsNone(self.cache.load_book_data(10))
+        self.cache.invalidate_book(10)
+        self.assertFalse(os.path.exists(self.cache._get_cache_path(10)))
+        # 무효화 뒤에 받은 세대로는 저장됨
+        self.cache.save_book_data(10, BOOK, self.cache.generation(10))
+        self.assertEqual(self.cache.load_book_data(10), BOOK)
+
+    def test_get_page_excludes_children(self):
+        self.cache.save_book_data(10, BOOK)
+        page = self.cache.get_page(10, 1)
+        self.assertEqual(page["subject"], "1. 소개")
+        self.assertNotIn("children", page)
+        self.assertIsNone(self.cache.get_page(10, 99))
+        self.assertEqual(self.cache.find_page(2)[0], 10)
+
+    def test_get_pages(self):
+        self.assertEqual(self.cache.get_pages(10, [1, 2]), {})
+        self.cache.save_book_data(10, BOOK)
+        pages = self.cache.get_pages(10, [3, 1, 99, 3])
+        self.assertEqual(list(pages), [3, 1])
+        self.assertNotIn("children", pages[1])
+
+    def test_find_page_uses_built_indexes_only(self):
+        self.cache.save_book_data(10, BOOK)
+        # get_page로 인덱스가 만들어지기 전에는 찾지 않음
+        self.assertIsNone(self.cache.find_page(3))
+        self.cache.get_page(10, 1)
+        book_id, page = self.cache.find_page(3)
+        self.assertEqual(book_id, 10)
+        self.assertEqual(page["subject"], "2. 활용")
+        self.assertIsNone(self.cache.find_page(99))
+        # 무효화되면 찾지 않음
+        self.cache.mark_stale(10)
+        self.assertIsNone(self.cache.find_page(3))
+
+
+    def test_books_with_page(self):
+        self.cache.save_book_data(10, BOOK)
+        self.cache.save_book_data(11, {"subject": "다른 책", "pages": [{"id": 20, "parent_id": 2}]})
+        self.cache._forget(10)
+        # 메모리에 없는 책도 디스크 파일에서 찾고, parent_id 같은 다른 키는 무시
+        self.assertEqual(self.cache.books_with_page(2), [10])
+        self.assertEqual(self.cache.books_with_page(20), [11])
+        self.assertEqual(self.cache.books_with_page(99), [])
+
+
+class TestPageSearcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = BookCache(cache_dir=self.tmp.name)
+        self.cache.save_book_data(10, BOOK)
+        self.searcher = PageSearcher(self.cache)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_search_pages(self):
+        results = self.searcher.search_pages(10, "MCP")
+        self.assertEqual([r["id"] for r in results], [1, 3])
+        self.assertEqual(results[0]["match_type"], "content_match")
+
+        # 한국어 부분 문자열도 검색되어야 함
+        results = self.searcher.search_pages(10, "설치")
+        self.assertEqual([r["id"] for r in results], [2])
+        self.assertEqual(results[0]["match_type"], "title_match")
+
+        self.assertEqual(self.searcher.search_pages(10, "없는단어"), [])
+
+    def test_search_pages_short_and_multiword_query(self):
+        # 한 글자 검색어는 인덱스 없이 전체 검색
+        results = self.searcher.search_pages(10, "개")
+        self.assertEqual([r["id"] for r in results], [1])
+
+        # 단어 중 하나만 포함해도 부분 매칭으로 검색됨
+        results = self.searcher.search_pages(10, "활용 설치")
+        self.assertEqual([r["id"] for r in results], [2, 3])
+
+    def test_search_index_follows_memory_cache(self):
+        book_data = self.cache.load_book_data(10)
+        index = self.searcher._get_index(10, book_data)
+        # 메모리 캐시의 같은 책 데이터면 인덱스 재사용
+        self.assertIs(self.searcher._get_index(10, book_data), index)
+        # 메모리 캐시에서 밀려나면 인덱스도 함께 해제
+        with mock.patch("search_utils.MEMORY_CACHE_SIZE", 1):
+            self.cache.save_book_data(11, BOOK)
+        self.assertNotIn(10, self.cache._memory)
+        self.assertIsNot(self.searcher._get_index(10, book_data), index)
+
+    def test_content_preview_uses_original_position(self):
+        # 태그·특수문자가 앞에 많아도 미리보기는 원문에서 검색어가 있는 위치를 보여줌
+        content = "<p>" * 100 + "앞부분, 끝 " + "x" * 200 + " 설치 방법 " + "y" * 200
+        book = {"pages": [{"id": 1, "subject": "제목", "content": content, "depth": 0, "children": []}]}
+        preview = self.searcher.search_pages(99, "설치", book_data=book)[0]["content_preview"]
+        self.assertIn("설치 방법", preview)
+        self.assertTrue(preview.startswith("...") and preview.endswith("..."))
+
+    def test_search_pages_with_preloaded_data(self):
+        results = self.searcher.search_pages(99, "활용", book_data=BOOK)
+        self.assertEqual([r["id"] for r in results], [3])
+
+    def test_get_book_structure(self):
+        structure = self.searcher.get_book_structure(10, max_depth=0)
+        self.assertEqual([p["id"] for p in structure], [1, 3])
+        structure = self.searcher.get_book_structure(10, max_depth=1)
+        self.assertEqual([p["id"] for p in structure], [1, 2, 3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import httpx
+import utils
+from http_client import set_client
+from utils import flatten_pages, count_pages, json_dumps, json_loads, json_load_file
+
+class TestFlattenPages(unittest.TestCase):
+
+    def test_preorder(self):
+        pages = [
+            {"id": 1, "children": [
+                {"id": 2, "children": [{"id": 3, "children": []}]},
+                {"id": 4},
+            ]},
+            {"id": 5, "children": []},
+            {"id": 6},
+        ]
+        # 목차 순서(부모 다음 자식, 형제는 원래 순서)
+        self.assertEqual([p["id"] for p in flatten_pages(pages)], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(flatten_pages([]), [])
+        self.assertEqual(count_pages(pages), 6)
+        self.assertEqual(count_pages([]), 0)
+
+class TestJson(unittest.TestCase):
+
+    def test_round_trip(self):
+        data = {"subject": "한글 제목", "pages": [{"id": 1}]}
+        self.assertEqual(json_loads(json_dumps(data)), data)
+        self.assertIn("한글".encode("utf-8"), json_dumps(data))
+        self.assertEqual(json_dumps({"b": 1, "a": 2}, sort_keys=True), b'{"a":2,"b":1}')
+
+    def test_non_str_keys(self):
+        # 표준 json과 같이 int 키는 문자열로 저장
+        self.assertEqual(json_loads(json_dumps({1: "a"})), {"1": "a"})
+
+    def test_load_file(self):
+        data = {"subject": "한글 제목", "pages": []}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "book.json")
+            with open(path, "wb") as f:
+                f.write(json_dumps(data))
+            self.assertEqual(json_load_file(path), data)
+            # 큰 파일 경로(mmap)도 같은 결과
+            with mock.patch.object(utils, "JSON_MMAP_THRESHOLD", 1):
+                self.assertEqual(json_load_file(path), data)
+
+class TestMakeApiRequest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.requests = []
+        patcher = mock.patch.object(utils, "API_TOKEN", "test-token")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(set_client, None)
+
+    def use_handler(self, handler):
+        def record(request):
+            self.requests.append(request)
+            return handler(request)
+        set_client(httpx.AsyncClient(transport=httpx.MockTransport(record)))
+
+    async def test_put_sends_json_body(self):
+        self.use_handler(lambda request: httpx.Response(200, content=request.content))
+        result = await utils.make_api_request("PUT", "/pages/1/", {"subject": "제목"})
+        self.assertEqual(result, {"subject": "제목"})
+        request = self.requests[0]
+        self.assertEqual(request.url.path, "/napi/pages/1/")
+        self.assertEqual(request.headers["Authorization"], "Token test-token")
+        self.assertEqual(request.headers["Content-Type"], "application/json")
+
+    async def test_method_dispatch(self):
+        self.use_handler(lambda request: httpx.Response(200, json={"method": request.method}))
+        # 소문자 메소드도 허용
+        self.assertEqual(await utils.make_api_request("post", "/pages/"), {"method": "POST"})
+        result = await utils.make_api_request("DELETE", "/pages/1/")
+        self.assertIn("지원되지 않는 HTTP 메소드", result["error"])
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_post_without_data_sends_no_body(self):
+        self.use_handler(lambda request: httpx.Response(200, json={}))
+        await utils.make_api_request("POST", "/pages/")
+        request = self.requests[0]
+        self.assertEqual(request.content, b"")
+        self.assertNotIn("Content-Type", request.headers)
+
+    async def test_not_found(self):
+        self.use_handler(lambda request: httpx.Response(404))
+        result = await utils.make_api_request("GET", "/pages/404/")
+        self.assertEqual(result["error"], "Not Found")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,20 @@
 import os
+import mmap
+import time
+import asyncio
+import mimetypes
+from collections import OrderedDict
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Awaitable, Tuple
 from dotenv import load_dotenv
+from http_client import get_client
+from api_loader import SingleFlight
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 모듈 사용
+    import json
+    orjson = None
 
 # .env 파일에서 환경 변수를 불러옵니다.
 load_dotenv()
@@ -9,6 +22,55 @@ load_dotenv()
 # --- API 설정 ---
 WIKIDOCS_API_URL = "https://wikidocs.net/napi"
 API_TOKEN = os.getenv("WIKIDOCS_API_TOKEN")
+# JSON 본문을 함께 보내는 메소드
+_BODY_METHODS = frozenset(("PUT", "POST"))
+
+# --- API 경로 템플릿 ---
+# 호출마다 f-string을 평가하지 않도록 미리 바인딩한 포맷 함수 (예: PAGE_URL(123) -> "/pages/123/")
+PAGE_URL = "/pages/%s/".__mod__
+BOOK_URL = "/books/%s/".__mod__
+BLOG_URL = "/blog/%s".__mod__
+
+# --- 조회 응답 캐시 설정 ---
+# 프로필·목록처럼 자주 반복 호출되고 잘 바뀌지 않는 GET 응답을 잠시 보관합니다.
+RESPONSE_CACHE_TTL = 30.0   # 초
+RESPONSE_CACHE_SIZE = 256
+
+_response_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+# 진행 중인 GET 요청. 동시에 들어온 같은 GET은 한 번만 보냅니다.
+_get_requests = SingleFlight(
+    cancelled_result={"error": "Request Failed", "message": "요청이 취소되었습니다."}
+)
+
+def json_dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """객체를 UTF-8 JSON 바이트로 직렬화 (orjson 우선)"""
+    if orjson is not None:
+        # 표준 json처럼 int 등 문자열이 아닌 dict 키도 허용
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None, sort_keys=sort_keys).encode('utf-8')
+
+def json_loads(data: bytes) -> Any:
+    """UTF-8 JSON 바이트를 파싱 (orjson 우선)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# 이 크기(바이트) 이상인 JSON 파일은 메모리 매핑하여 파싱 (파일 내용을 힙에 복사하지 않음)
+JSON_MMAP_THRESHOLD = 4 * 1024 * 1024
+
+def json_load_file(path: str) -> Any:
+    """JSON 파일을 읽어 파싱 (큰 파일은 orjson이 있으면 mmap으로 바로 파싱)"""
+    with open(path, 'rb') as f:
+        if orjson is not None and os.fstat(f.fileno()).st_size >= JSON_MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        return json_loads(f.read())
 
 def flatten_pages(pages: List[Dict]) -> List[Dict]:
     """
@@ -21,37 +83,98 @@ def flatten_pages(pages: List[Dict]) -> List[Dict]:
         평면화된 페이지 리스트
     """
     flat: List[Dict] = []
-    stack = pages[:]  # 복사해서 스택으로 사용
+    # 뒤에서부터 꺼내므로 역순으로 넣어야 목차 순서(전위 순회)가 유지됨
+    stack = pages[::-1]
+    append, pop, push = flat.append, stack.pop, stack.extend
     
     while stack:
-        node = stack.pop()
-        flat.append(node)
+        node = pop()
+        append(node)
         # children이 있을 때 스택에 push (깊이 우선 탐색)
-        for child in reversed(node.get("children", [])):
-            stack.append(child)
+        children = node.get("children")
+        if children:
+            push(reversed(children))
     
     return flat
 
+def count_pages(pages: List[Dict]) -> int:
+    """
+    중첩된 페이지 구조의 전체 페이지 수를 셉니다.
+    
+    flatten_pages와 같지만 목록을 만들지 않습니다. (순서가 필요 없으므로 그대로 push)
+    """
+    count = 0
+    stack = list(pages)
+    pop, push = stack.pop, stack.extend
+    
+    while stack:
+        node = pop()
+        count += 1
+        children = node.get("children")
+        if children:
+            push(children)
+    
+    return count
+
+async def gather_with_limit(limit: int, *aws: Awaitable) -> List[Any]:
+    """
+    동시 실행 개수를 제한하여 여러 코루틴을 병렬로 실행합니다.
+    
+    Args:
+        limit: 동시에 실행할 최대 코루틴 수
+        aws: 실행할 코루틴들
+    
+    Returns:
+        입력 순서대로 정렬된 결과 리스트
+    """
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def run(aw: Awaitable) -> Any:
+        async with semaphore:
+            return await aw
+    
+    return await asyncio.gather(*(run(aw) for aw in aws))
+
 async def make_api_request(method: str, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
-    """위키독스 API 요청을 처리하는 공통 함수"""
+    """
+    위키독스 API 요청을 처리하는 공통 함수
+    
+    같은 endpoint에 대한 GET이 이미 진행 중이면 새 요청을 보내지 않고
+    그 응답을 함께 받습니다. (이 경우 반환된 데이터는 공유되므로 수정하지 마세요.)
+    """
+    method = method.upper()
+    if method != "GET":
+        return await _send_api_request(method, endpoint, data)
+    
+    return await _get_requests.fetch(endpoint, lambda: _send_api_request("GET", endpoint))
+
+async def _send_api_request(method: str, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
+    """API 요청을 실제로 전송하고 응답 또는 오류 딕셔너리를 반환 (method는 대문자)"""
     if not API_TOKEN:
         return {"error": "API 토큰이 설정되지 않았습니다."}
     
     headers = {"Authorization": f"Token {API_TOKEN}"}
     
+    url = f"{WIKIDOCS_API_URL}{endpoint}"
+    
     try:
-        async with httpx.AsyncClient(base_url=WIKIDOCS_API_URL, headers=headers) as client:
-            if method.upper() == "GET":
-                response = await client.get(endpoint)
-            elif method.upper() == "PUT":
-                response = await client.put(endpoint, json=data)
-            elif method.upper() == "POST":
-                response = await client.post(endpoint, json=data)
-            else:
-                return {"error": f"지원되지 않는 HTTP 메소드: {method}"}
-            
-            response.raise_for_status()
-            return response.json()
+        client = get_client()
+        if method == "GET":
+            response = await client.get(url, headers=headers)
+        elif method in _BODY_METHODS:
+            # 본문을 미리 직렬화한 바이트로 보냄 (httpx의 json= 인코딩보다 빠름)
+            # data가 없으면 json=None처럼 본문 없이 보냄 ("null"을 보내지 않도록)
+            content = None
+            if data is not None:
+                headers["Content-Type"] = "application/json"
+                content = json_dumps(data)
+            response = await client.request(method, url, content=content, headers=headers)
+        else:
+            return {"error": f"지원되지 않는 HTTP 메소드: {method}"}
+        
+        response.raise_for_status()
+        # 위키독스 API는 UTF-8 JSON을 반환하므로 response.json()의 인코딩 추정 없이 바이트를 바로 파싱
+        return json_loads(response.content)
             
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
@@ -63,29 +186,69 @@ async def make_api_request(method: str, endpoint: str, data: Optional[Dict] = No
     except Exception as e:
         return {"error": "Request Failed", "message": str(e)}
 
+async def cached_api_get(endpoint: str, ttl: float = RESPONSE_CACHE_TTL) -> Any:
+    """
+    짧은 TTL 동안 응답을 재사용하는 GET 요청
+    
+    오류 응답은 캐시하지 않습니다. 데이터를 바꾸는 도구는 성공 후
+    clear_response_cache()를 호출해야 합니다.
+    """
+    return (await cached_api_get_entry(endpoint, ttl))[1]
+
+async def cached_api_get_entry(endpoint: str, ttl: float = RESPONSE_CACHE_TTL) -> Tuple[float, Any]:
+    """
+    cached_api_get과 같지만 (요청 시각, 응답)을 반환
+    
+    요청 시각은 time.monotonic() 값이며, 캐시된 응답이면 원래 요청한 시각입니다.
+    """
+    now = time.monotonic()
+    entry = _response_cache.get(endpoint)
+    if entry is not None and now - entry[0] < ttl:
+        _response_cache.move_to_end(endpoint)
+        return entry
+    
+    result = await make_api_request("GET", endpoint)
+    if "error" not in result:
+        _response_cache[endpoint] = (now, result)
+        _response_cache.move_to_end(endpoint)
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+    return now, result
+
+def clear_response_cache() -> None:
+    """캐시된 GET 응답을 모두 버립니다."""
+    _response_cache.clear()
+
 async def put_page(page_id: int, data: Dict[str, Any]) -> dict:
     """/napi/pages/{page_id} : 페이지를 수정합니다. (신규 페이지 등록인 경우에는 page_id 에 -1 설정)"""
-    data['depth'] = 0
-    data['seq'] = 0
-    return await make_api_request("PUT", f"/pages/{page_id}/", data)
+    # 호출한 쪽의 딕셔너리는 수정하지 않음 (create_page처럼 이미 0으로 채워 두었으면 그대로 전송)
+    if data.get('depth') != 0 or data.get('seq') != 0:
+        data = {**data, 'depth': 0, 'seq': 0}
+    return await make_api_request("PUT", PAGE_URL(page_id), data)
 
 async def upload_image(endpoint: str, file_path: str, data: Dict[str, Any]) -> Dict[str, Any]:
     """이미지 업로드 공통 함수"""
     if not API_TOKEN:
         return {"error": "API 토큰이 설정되지 않았습니다."}
     
-    if not os.path.exists(file_path):
+    # 파일 시스템 호출이 이벤트 루프를 막지 않도록 스레드에서 실행
+    if not await asyncio.to_thread(os.path.exists, file_path):
         return {"error": f"파일을 찾을 수 없습니다: {file_path}"}
     
     headers = {"Authorization": f"Token {API_TOKEN}"}
     
     try:
-        async with httpx.AsyncClient(base_url=WIKIDOCS_API_URL, headers=headers) as client:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = await client.post(endpoint, files=files, data=data)
-                response.raise_for_status()
-                return response.json()
+        client = get_client()
+        # 파일 객체를 그대로 넘기면 httpx가 전송 시 청크 단위로 읽어 보내므로
+        # 파일 전체를 메모리에 올리지 않습니다.
+        file_name = os.path.basename(file_path)
+        content_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+        f = await asyncio.to_thread(open, file_path, 'rb')
+        with f:
+            files = {'file': (file_name, f, content_type)}
+            response = await client.post(f"{WIKIDOCS_API_URL}{endpoint}", files=files, data=data, headers=headers)
+            response.raise_for_status()
+            return json_loads(response.content)
     except httpx.HTTPStatusError as e:
         return {"error": f"HTTP Error {e.response.status_code}", "message": str(e)}
     except Exception as e: